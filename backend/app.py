@@ -1,36 +1,106 @@
 import asyncio
+import os
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
 import strawberry
-from database import init_db, seed_data
+from batching import BatchMiddleware
+from compression import CompressionMiddleware
+from profiling import ProfilingMiddleware
+from ratelimit import RateLimitMiddleware
+from database import init_db, seed_data, get_storage, use_storage, run_auto_archive
+from loaders import InvalidateLoaders, get_context
 from resolvers import Query, Mutation
+from warming import WarmUp, warm_up
+
+# How often to apply the auto-archive policy, 0 disables it
+ARCHIVE_INTERVAL_MINUTES = int(os.getenv('ARCHIVE_INTERVAL_MINUTES', '0'))
 
 @strawberry.type
 class Schema:
     query: Query = strawberry.field(resolver=lambda: Query())
     mutation: Mutation = strawberry.field(resolver=lambda: Mutation())
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[InvalidateLoaders])
+
+class StorageMiddleware:
+    """Routes every request handled by this app to its own storage engine"""
+    def __init__(self, app, storage):
+        self.app = app
+        self.storage = storage
+
+    async def __call__(self, scope, receive, send):
+        with use_storage(self.storage):
+            await self.app(scope, receive, send)
+
+async def auto_archive_loop(storage, interval):
+    """Periodically archive old tickets in done columns"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            with use_storage(storage):
+                archived = await asyncio.to_thread(run_auto_archive)
+            print(f"Auto-archived {archived} tickets")
+        except Exception as e:
+            print(f"Error auto-archiving tickets: {e}")
+
+def create_app(storage=None):
+    """
+    Build the API. storage pins this app instance to a storage engine
+    (e.g. InMemoryStorage for tests and benchmarks); by default it uses
+    the process-wide engine picked by STORAGE_BACKEND.
+    """
+    app = FastAPI(title="Trello-like API")
+    app.state.warm_up = WarmUp()
+
+    app.add_middleware(BatchMiddleware, schema=schema)
+    if storage is not None:
+        app.add_middleware(StorageMiddleware, storage=storage)
+    app.add_middleware(ProfilingMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(CompressionMiddleware)
+
+    graphql_app = GraphQLRouter(schema, context_getter=get_context)
+    app.include_router(graphql_app, prefix="/graphql")
+
+    @app.get("/ready")
+    async def ready():
+        """Readiness probe, 503 until the startup warm-up has finished"""
+        warm_up_progress = app.state.warm_up
+        return JSONResponse(warm_up_progress.status(), status_code=200 if warm_up_progress.ready else 503)
 
-app = FastAPI(title="Trello-like API")
+    @app.on_event("startup")
+    async def startup_event():
+        with use_storage(storage or get_storage()):
+            await init_db()
+            await seed_data()
+        # Warm the working set in the background, /ready reports progress
+        app.state.warm_up_task = asyncio.create_task(warm_up(storage or get_storage(), app.state.warm_up))
+        if ARCHIVE_INTERVAL_MINUTES > 0:
+            app.state.auto_archive_task = asyncio.create_task(
+                auto_archive_loop(storage or get_storage(), ARCHIVE_INTERVAL_MINUTES * 60)
+            )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        if getattr(app.state, 'warm_up_task', None):
+            app.state.warm_up_task.cancel()
+        if getattr(app.state, 'auto_archive_task', None):
+            app.state.auto_archive_task.cancel()
+        (storage or get_storage()).flush()
 
-graphql_app = GraphQLRouter(schema)
-app.include_router(graphql_app, prefix="/graphql")
+    return app
 
-@app.on_event("startup")
-async def startup_event():
-    await init_db()
-    await seed_data()
+app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=4000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=4000)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+
+from starlette.responses import JSONResponse
+
+from loaders import RequestLoaders
+from profiling import profiled
+
+# Largest number of operations accepted in one batched request
+BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', '20'))
+
+
+def batch_error(message):
+    return JSONResponse({'errors': [{'message': message}]}, status_code=400)
+
+
+def validate_batch(operations, max_operations):
+    """Error message for a malformed batch, or None"""
+    if not operations:
+        return 'Batch must contain at least one operation'
+    if len(operations) > max_operations:
+        return f'Batch exceeds the limit of {max_operations} operations'
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not isinstance(operation.get('query'), str):
+            return f'Operation {index} must be an object with a query'
+        if not isinstance(operation.get('variables') or {}, dict):
+            return f'Operation {index} variables must be an object'
+        if not isinstance(operation.get('operationName') or '', str):
+            return f'Operation {index} operationName must be a string'
+        depends_on = operation.get('dependsOn', [])
+        if not isinstance(depends_on, list) or not all(
+            isinstance(dependency, int) and 0 <= dependency < index for dependency in depends_on
+        ):
+            return f'Operation {index} dependsOn must list earlier operations by index'
+    return None
+
+
+class BatchMiddleware:
+    """
+    Accepts a JSON array of GraphQL operations in one POST to path.
+    Operations run concurrently unless they list earlier operations (by
+    index) in dependsOn, in which case they start once those have
+    finished. All operations share one set of request loaders, and the
+    results come back as one array in request order.
+    """
+    def __init__(self, app, schema, path='/graphql', max_operations=BATCH_MAX_OPERATIONS):
+        self.app = app
+        self.schema = schema
+        self.path = path
+        self.max_operations = max_operations
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'].rstrip('/') != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        if not body.lstrip().startswith(b'['):
+            # a single operation, hand the body on to the GraphQL router
+            replayed = False
+
+            async def replay():
+                nonlocal replayed
+                if not replayed:
+                    replayed = True
+                    return {'type': 'http.request', 'body': body, 'more_body': False}
+                return await receive()
+
+            await self.app(scope, replay, send)
+            return
+
+        try:
+            operations = json.loads(body)
+        except ValueError:
+            await batch_error('Batch body is not valid JSON')(scope, receive, send)
+            return
+        error = validate_batch(operations, self.max_operations)
+        if error:
+            await batch_error(error)(scope, receive, send)
+            return
+
+        results = await self.execute(operations)
+        await JSONResponse(results)(scope, receive, send)
+
+    async def execute(self, operations):
+        context = {'loaders': RequestLoaders()}
+        tasks = []
+
+        async def run(operation):
+            dependencies = [tasks[index] for index in operation.get('dependsOn', [])]
+            if dependencies:
+                await asyncio.wait(dependencies)
+            # Resolvers are synchronous, so run each operation on a worker
+            # thread to overlap their DynamoDB round trips
+            try:
+                result = await asyncio.to_thread(
+                    profiled(self.schema.execute_sync),
+                    operation['query'],
+                    variable_values=operation.get('variables'),
+                    context_value=context,
+                    operation_name=operation.get('operationName'),
+                )
+            except Exception as e:
+                # one failing operation mustn't lose the others' results
+                print(f"Error executing batched operation: {e}")
+                return {'data': None, 'errors': [{'message': str(e)}]}
+            response = {'data': result.data}
+            if result.errors:
+                response['errors'] = [error.formatted for error in result.errors]
+            return response
+
+        for operation in operations:
+            tasks.append(asyncio.ensure_future(run(operation)))
+        return await asyncio.gather(*tasks)
@@ -0,0 +1,76 @@
+"""
+Compression benchmark: seeds a large board and compares response bytes and
+latency of the board snapshot query with identity, gzip and brotli encoding.
+
+Run from backend/ (add --storage dynamodb with DynamoDB Local up):
+    python benchmarks/bench_compression.py --tickets 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from httpx import AsyncClient
+from database import create_storage
+from app import create_app
+
+BOARD_QUERY = """
+query GetBoardData($boardId: String!) {
+    board(id: $boardId) { id name createdAt }
+    columns(boardId: $boardId) { id boardId name position createdAt }
+    allTickets(boardId: $boardId) { id columnId title description position createdAt }
+}
+"""
+
+DESCRIPTION = (
+    "As a user I want to drag this ticket between columns so that the board "
+    "reflects the current state of the work. Acceptance criteria: the ticket "
+    "keeps its title, description and position after a reload. "
+)
+
+def seed_large_board(storage, board_id, columns, tickets):
+    storage.create_board('Benchmark Board', board_id)
+    column_ids = [storage.create_column(board_id, f'Column {i}', i)['id'] for i in range(columns)]
+    for i in range(tickets):
+        column_id = column_ids[i % columns]
+        storage.create_ticket(column_id, f'Ticket {i}', DESCRIPTION * 3, i // columns)
+
+async def measure(client, board_id, encoding, rounds):
+    payload = {"query": BOARD_QUERY, "variables": {"boardId": board_id}}
+    headers = {"Accept-Encoding": encoding}
+    timings = []
+    wire_bytes = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = await client.post("/graphql", json=payload, headers=headers)
+        timings.append(time.perf_counter() - start)
+        wire_bytes = int(response.headers.get("content-length", len(response.content)))
+    timings.sort()
+    return wire_bytes, timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--columns', type=int, default=5)
+    parser.add_argument('--tickets', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--storage', choices=['memory', 'dynamodb'], default='memory')
+    args = parser.parse_args()
+
+    board_id = 'bench-compression-board'
+    storage = create_storage(args.storage)
+    storage.init()
+    seed_large_board(storage, board_id, args.columns, args.tickets)
+    try:
+        async with AsyncClient(app=create_app(storage), base_url="http://bench") as client:
+            print(f"{'encoding':<10}{'bytes':>10}{'p50 ms':>10}{'p95 ms':>10}")
+            for encoding in ('identity', 'gzip', 'br'):
+                wire_bytes, p50, p95 = await measure(client, board_id, encoding, args.rounds)
+                print(f"{encoding:<10}{wire_bytes:>10}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}")
+    finally:
+        storage.delete_board(board_id)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Write sharding benchmark: models DynamoDB's per-partition write limit on the
+column_id-index GSI and compares how long a burst of ticket writes to one hot
+column takes with the column unsharded and with its key spread over shards.
+
+DynamoDB Local does not throttle, so each GSI partition key is modelled as a
+token bucket (--partition-wcu writes per second) on a simulated clock, fed
+with the real shard_key() layout. Buckets start empty, so the burst is
+measured at the sustained partition rate.
+
+Sharding costs reads: get_tickets_by_column queries every shard. The read
+section runs DynamoDBStorage against moto in-process, or DynamoDB Local with
+--endpoint, and reports the queries and latency per column read.
+
+Run from backend/:
+    python benchmarks/bench_sharding.py --writes 20000 --shards 1 4 8 16
+    python benchmarks/bench_sharding.py --endpoint http://localhost:8000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dynamodb_storage import DynamoDBStorage, shard_key
+from profiling import _boto3_timings
+from ratelimit import TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def simulate(column_id, ticket_ids, shard_count, partition_wcu):
+    """Seconds to land every write, and how many attempts were throttled"""
+    # Partitions absorb writes independently, so each key gets its own clock
+    # and the burst is done when the busiest partition has drained
+    partitions = {}
+    throttled = 0
+    for ticket_id in ticket_ids:
+        key = shard_key(column_id, ticket_id, shard_count)
+        if key not in partitions:
+            clock = Clock()
+            bucket = TokenBucket(partition_wcu, partition_wcu, clock)
+            # no banked burst capacity, every write waits for the partition rate
+            bucket.tokens = 0
+            partitions[key] = (clock, bucket)
+        clock, bucket = partitions[key]
+        wait = bucket.take()
+        while wait:
+            # a throttled write is retried once its partition has capacity
+            throttled += 1
+            clock.now += wait + 1e-9
+            wait = bucket.take()
+    return max(clock.now for clock, _ in partitions.values()), throttled, len(partitions)
+
+def measure_reads(storage, shard_count, tickets, reads):
+    """Queries and milliseconds per get_tickets_by_column of a column on a board with shard_count shards"""
+    board = storage.create_board(f'Benchmark {shard_count} shards', shard_count=shard_count)
+    column = storage.create_column(board['id'], 'To Do', 0)
+    for i in range(tickets):
+        storage.create_ticket(column['id'], f'Ticket {i}', '', i)
+
+    latencies = []
+    queries = 0
+    for _ in range(reads):
+        # the shard queries run in copies of this context, so they are all counted
+        timings = {'operations': {}}
+        token = _boto3_timings.set(timings)
+        try:
+            started = time.perf_counter()
+            read = storage.get_tickets_by_column(column['id'])
+            latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            _boto3_timings.reset(token)
+        assert len(read) == tickets
+        queries += timings['operations'].get('Query', {}).get('calls', 0)
+
+    storage.delete_board(board['id'])
+    return board['shard_count'], queries / reads, statistics.median(latencies), max(latencies)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writes', type=int, default=20000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--partition-wcu', type=int, default=1000)
+    parser.add_argument('--tickets', type=int, default=200, help='tickets in the column read back')
+    parser.add_argument('--reads', type=int, default=50)
+    parser.add_argument('--endpoint', help='DynamoDB Local endpoint, moto is used when not given')
+    args = parser.parse_args()
+
+    column_id = str(uuid.uuid4())
+    ticket_ids = [str(uuid.uuid4()) for _ in range(args.writes)]
+
+    print(f"{args.writes} ticket writes to one column, {args.partition_wcu} writes/s per GSI partition key")
+    print(f"{'shards':>8} {'keys':>6} {'seconds':>10} {'writes/s':>10} {'throttled':>10}")
+    for shard_count in args.shards:
+        seconds, throttled, keys = simulate(column_id, ticket_ids, shard_count, args.partition_wcu)
+        print(f"{shard_count:>8} {keys:>6} {seconds:>10.2f} {args.writes / seconds:>10.0f} {throttled:>10}")
+
+    if args.endpoint:
+        backend, mock = args.endpoint, nullcontext()
+    else:
+        from moto import mock_aws
+        # moto serves the AWS endpoint in-process
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+        backend, mock = 'moto', mock_aws()
+
+    with mock:
+        storage = DynamoDBStorage(args.endpoint or f"https://dynamodb.{os.environ['AWS_DEFAULT_REGION']}.amazonaws.com")
+        storage.init()
+        print()
+        print(f"get_tickets_by_column of a {args.tickets} ticket column, {args.reads} reads ({backend})")
+        print(f"{'shards':>8} {'queries':>8} {'p50 ms':>8} {'max ms':>8}")
+        for shard_count in args.shards:
+            shards, queries, median, slowest = measure_reads(storage, shard_count, args.tickets, args.reads)
+            print(f"{shards:>8} {queries:>8.1f} {median:>8.2f} {slowest:>8.2f}")
+
+if __name__ == "__main__":
+    main()
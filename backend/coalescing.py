@@ -0,0 +1,220 @@
+import threading
+from storage import Storage, now
+
+# A queued update is dropped after failing to flush this many times
+MAX_FLUSH_ATTEMPTS = 5
+
+
+class CoalescingStorage(Storage):
+    """
+    Write-behind queue in front of another storage engine. update_ticket
+    calls for the same ticket within window seconds are merged and flushed
+    as a single write. Pending updates are overlaid on every ticket read,
+    so callers always see their own writes before the flush lands, and
+    pending moves are overlaid on the column ticket counts.
+    The lock only guards the queue, storage calls are made outside it.
+    """
+
+    def __init__(self, storage, window):
+        self.storage = storage
+        self.window = window
+        self.lock = threading.RLock()
+        # one flush at a time, so writes to a ticket land in order
+        self.flush_lock = threading.Lock()
+        # ticket_id -> {'fields': merged pending fields, 'item': merged item,
+        #               'from_column': column before the update, 'attempts': failed flushes}
+        self.pending = {}
+        # the updates the running flush is writing
+        self.in_flight = {}
+        self.timer = None
+
+    def schedule(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.window, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def update_ticket(self, ticket_id, title=None, description=None, column_id=None, position=None):
+        fields = {
+            'title': title,
+            'description': description,
+            'column_id': column_id,
+            'position': position,
+        }
+        fields = {name: value for name, value in fields.items() if value is not None}
+        item = None
+        while True:
+            with self.lock:
+                entry = self.pending.get(ticket_id)
+                if entry is None and item is not None:
+                    entry = self.pending[ticket_id] = {
+                        'fields': {}, 'item': item, 'from_column': item.get('column_id'), 'attempts': 0
+                    }
+                if entry is not None:
+                    entry['fields'].update(fields)
+                    entry['item'].update(fields)
+                    entry['item']['updated_at'] = now()
+                    self.schedule()
+                    return dict(entry['item'])
+            # first update in this window, read the ticket without holding the lock
+            item = self.get_ticket(ticket_id) or {'id': ticket_id}
+
+    def flush(self):
+        """Write every pending ticket update, requeueing the ones that fail"""
+        with self.flush_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                pending, self.pending = self.pending, {}
+                self.in_flight = pending
+
+            failed = {}
+            for ticket_id, entry in pending.items():
+                try:
+                    self.storage.update_ticket(ticket_id, **entry['fields'])
+                except Exception as e:
+                    entry['attempts'] += 1
+                    if entry['attempts'] >= MAX_FLUSH_ATTEMPTS:
+                        print(f"Giving up on update for ticket {ticket_id} after {entry['attempts']} attempts: {e}")
+                    else:
+                        print(f"Error flushing update for ticket {ticket_id}, will retry: {e}")
+                        failed[ticket_id] = entry
+
+            with self.lock:
+                self.in_flight = {}
+                for ticket_id, entry in failed.items():
+                    newer = self.pending.get(ticket_id)
+                    if newer is not None:
+                        # keep the failed fields under anything queued since
+                        entry = {
+                            'fields': {**entry['fields'], **newer['fields']},
+                            'item': newer['item'],
+                            'from_column': entry['from_column'],
+                            'attempts': entry['attempts'],
+                        }
+                    self.pending[ticket_id] = entry
+                if self.pending:
+                    self.schedule()
+
+    def queued(self, ticket_id):
+        """Fields and item of a ticket's queued or in-flight update, caller holds the lock"""
+        flying = self.in_flight.get(ticket_id)
+        entry = self.pending.get(ticket_id)
+        if flying is None and entry is None:
+            return None, None
+        fields = {**(flying['fields'] if flying else {}), **(entry['fields'] if entry else {})}
+        return fields, (entry or flying)['item']
+
+    def overlay(self, ticket):
+        fields, _ = self.queued(ticket['id'])
+        if fields is None:
+            return ticket
+        return {**ticket, **fields}
+
+    """
+    TICKETS - reads overlay pending updates
+    """
+    def get_ticket(self, ticket_id):
+        with self.lock:
+            entry = self.pending.get(ticket_id)
+            if entry is not None:
+                return dict(entry['item'])
+        ticket = self.storage.get_ticket(ticket_id)
+        if ticket is None:
+            return None
+        with self.lock:
+            return self.overlay(ticket)
+
+    def get_tickets_by_column(self, column_id, attributes=None):
+        stored = self.storage.get_tickets_by_column(column_id, attributes)
+        with self.lock:
+            tickets = [self.overlay(ticket) for ticket in stored]
+            tickets = [ticket for ticket in tickets if ticket.get('column_id') == column_id]
+            # tickets with a pending move into this column
+            present = {ticket['id'] for ticket in tickets}
+            for ticket_id in set(self.pending) | set(self.in_flight):
+                fields, item = self.queued(ticket_id)
+                if fields.get('column_id') == column_id and ticket_id not in present:
+                    tickets.append({**item, **fields})
+        return sorted(tickets, key=lambda x: x['position'])
+
+    def create_ticket(self, column_id, title, description, position, id=None):
+        return self.storage.create_ticket(column_id, title, description, position, id)
+
+    def delete_ticket(self, ticket_id):
+        # wait out a running flush so it can't write the ticket back
+        with self.flush_lock:
+            with self.lock:
+                self.pending.pop(ticket_id, None)
+        return self.storage.delete_ticket(ticket_id)
+
+    """
+    Everything else goes straight through, flushing first where a
+    pending ticket write could change the outcome
+    """
+    def init(self):
+        self.storage.init()
+
+    def get_tables(self):
+        return self.storage.get_tables()
+
+    def seed(self):
+        self.storage.seed()
+
+    def get_boards(self):
+        return self.storage.get_boards()
+
+    def get_board(self, board_id):
+        return self.storage.get_board(board_id)
+
+    def create_board(self, name, id=None, shard_count=None):
+        return self.storage.create_board(name, id, shard_count)
+
+    def update_board(self, board_id, name):
+        return self.storage.update_board(board_id, name)
+
+    def delete_board(self, board_id):
+        self.flush()
+        return self.storage.delete_board(board_id)
+
+    def get_board_summaries(self):
+        return self.storage.get_board_summaries()
+
+    def get_columns_by_board(self, board_id, attributes=None):
+        return [self.count_moves(column) for column in self.storage.get_columns_by_board(board_id, attributes)]
+
+    def create_column(self, board_id, name, position, id=None):
+        return self.storage.create_column(board_id, name, position, id)
+
+    def update_column(self, column_id, name=None, position=None):
+        return self.storage.update_column(column_id, name, position)
+
+    def get_column(self, column_id):
+        return self.count_moves(self.storage.get_column(column_id))
+
+    def count_moves(self, column):
+        """Apply pending moves in or out of column to its ticket_count"""
+        if not column or 'ticket_count' not in column:
+            return column
+        delta = 0
+        with self.lock:
+            for entry in self.pending.values():
+                to_column = entry['fields'].get('column_id')
+                if to_column is None or to_column == entry['from_column']:
+                    continue
+                delta += (to_column == column['id']) - (entry['from_column'] == column['id'])
+        if delta:
+            column = {**column, 'ticket_count': column['ticket_count'] + delta}
+        return column
+
+    def delete_column(self, column_id):
+        self.flush()
+        return self.storage.delete_column(column_id)
+
+    def archive_ticket(self, ticket_id):
+        self.flush()
+        return self.storage.archive_ticket(ticket_id)
+
+    def get_archived_tickets(self, board_id, limit=50, cursor=None):
+        return self.storage.get_archived_tickets(board_id, limit, cursor)
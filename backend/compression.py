@@ -0,0 +1,120 @@
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, fall back to gzip only
+    brotli = None
+
+# Compression settings
+COMPRESSION_MINIMUM_SIZE = int(os.getenv('COMPRESSION_MINIMUM_SIZE', '1024'))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '5'))
+
+
+def supported_encodings():
+    """Encodings this server can produce, in order of preference"""
+    if brotli is not None:
+        return ['br', 'gzip']
+    return ['gzip']
+
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into a {coding: q} dict"""
+    codings = {}
+    for part in header.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def negotiate_encoding(header, available=None):
+    """Pick the best encoding the client accepts, or None for identity"""
+    if available is None:
+        available = supported_encodings()
+    codings = parse_accept_encoding(header or '')
+    best = None
+    best_q = 0.0
+    for encoding in available:
+        q = codings.get(encoding, codings.get('*', 0.0))
+        # ties keep the earlier (preferred) server encoding
+        if q > best_q:
+            best = encoding
+            best_q = q
+    return best
+
+
+def compress(body, encoding, level=COMPRESSION_LEVEL):
+    if encoding == 'br':
+        # brotli quality goes 0-11, gzip levels 1-9 map onto it directly
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for responses over minimum_size.
+    Only whole (non-streaming) bodies are compressed, which covers every
+    GraphQL response; streamed bodies are passed through untouched.
+    """
+    def __init__(self, app, minimum_size=COMPRESSION_MINIMUM_SIZE, compression_level=COMPRESSION_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compression_level = compression_level
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        initial_message = {}
+        started = False
+
+        async def send_compressed(message):
+            nonlocal initial_message, started
+            if message['type'] == 'http.response.start':
+                # Hold the headers until we know whether the body gets compressed
+                initial_message = message
+                return
+            if message['type'] != 'http.response.body' or started:
+                await send(message)
+                return
+
+            started = True
+            body = message.get('body', b'')
+            response_headers = MutableHeaders(raw=initial_message['headers'])
+            if (
+                message.get('more_body', False)
+                or 'content-encoding' in response_headers
+                or len(body) < self.minimum_size
+            ):
+                await send(initial_message)
+                await send(message)
+                return
+
+            body = compress(body, encoding, self.compression_level)
+            response_headers['Content-Encoding'] = encoding
+            response_headers['Content-Length'] = str(len(body))
+            response_headers.add_vary_header('Accept-Encoding')
+            message['body'] = body
+            await send(initial_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,329 +1,155 @@
-import boto3
 import os
-from botocore.exceptions import ClientError
-from datetime import datetime
-import uuid
-
-# DynamoDB setup
-dynamodb_endpoint = os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000')
-dynamodb = boto3.resource('dynamodb', endpoint_url=dynamodb_endpoint)
-dynamodb_client = boto3.client('dynamodb', endpoint_url=dynamodb_endpoint)
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Storage setup - STORAGE_BACKEND is 'dynamodb' (default) or 'memory'
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'dynamodb')
+# Write coalescing window for ticket updates, 0 disables it
+WRITE_COALESCE_WINDOW_MS = int(os.getenv('WRITE_COALESCE_WINDOW_MS', '0'))
+
+_default_storage = None
+_current_storage = ContextVar('current_storage', default=None)
+
+def create_storage(backend=None, coalesce_window_ms=None, working_set=None):
+    """
+    Create a storage engine by name, optionally behind a write coalescing
+    queue and an in-process working set of hot boards (on when
+    WARM_BOARD_COUNT is set)
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == 'dynamodb':
+        from dynamodb_storage import DynamoDBStorage
+        storage = DynamoDBStorage()
+    elif backend == 'memory':
+        from memory_storage import InMemoryStorage
+        storage = InMemoryStorage()
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    if coalesce_window_ms is None:
+        coalesce_window_ms = WRITE_COALESCE_WINDOW_MS
+    if coalesce_window_ms > 0:
+        from coalescing import CoalescingStorage
+        storage = CoalescingStorage(storage, coalesce_window_ms / 1000)
+
+    from warming import WARM_BOARD_COUNT, WorkingSetStorage
+    if working_set is None:
+        working_set = WARM_BOARD_COUNT > 0
+    if working_set:
+        storage = WorkingSetStorage(storage)
+    return storage
+
+def get_storage():
+    """Storage for the current request, falling back to the process default"""
+    global _default_storage
+    storage = _current_storage.get()
+    if storage is not None:
+        return storage
+    if _default_storage is None:
+        _default_storage = create_storage()
+    return _default_storage
+
+def set_storage(storage):
+    """Replace the process default storage"""
+    global _default_storage
+    _default_storage = storage
+
+@contextmanager
+def use_storage(storage):
+    """Route the database functions to storage for the enclosed block"""
+    token = _current_storage.set(storage)
+    try:
+        yield storage
+    finally:
+        _current_storage.reset(token)
 
 async def init_db():
-    """Initialize DynamoDB tables"""
-    tables_to_create = [
-        {
-            'TableName': 'boards',
-            'KeySchema': [
-                {'AttributeName': 'id', 'KeyType': 'HASH'}
-            ],
-            'AttributeDefinitions': [
-                {'AttributeName': 'id', 'AttributeType': 'S'}
-            ],
-            'BillingMode': 'PAY_PER_REQUEST'
-        },
-        {
-            'TableName': 'columns',
-            'KeySchema': [
-                {'AttributeName': 'id', 'KeyType': 'HASH'}
-            ],
-            'AttributeDefinitions': [
-                {'AttributeName': 'id', 'AttributeType': 'S'},
-                {'AttributeName': 'board_id', 'AttributeType': 'S'}
-            ],
-            'GlobalSecondaryIndexes': [
-                {
-                    'IndexName': 'board_id-index',
-                    'KeySchema': [
-                        {'AttributeName': 'board_id', 'KeyType': 'HASH'}
-                    ],
-                    'Projection': {'ProjectionType': 'ALL'}
-                }
-            ],
-            'BillingMode': 'PAY_PER_REQUEST'
-        },
-        {
-            'TableName': 'tickets',
-            'KeySchema': [
-                {'AttributeName': 'id', 'KeyType': 'HASH'}
-            ],
-            'AttributeDefinitions': [
-                {'AttributeName': 'id', 'AttributeType': 'S'},
-                {'AttributeName': 'column_id', 'AttributeType': 'S'}
-            ],
-            'GlobalSecondaryIndexes': [
-                {
-                    'IndexName': 'column_id-index',
-                    'KeySchema': [
-                        {'AttributeName': 'column_id', 'KeyType': 'HASH'}
-                    ],
-                    'Projection': {'ProjectionType': 'ALL'}
-                }
-            ],
-            'BillingMode': 'PAY_PER_REQUEST'
-        }
-    ]
-    
-    for table_config in tables_to_create:
-        try:
-            table = dynamodb_client.create_table(**table_config)
-            print(f"Created table: {table_config['TableName']}")
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'ResourceInUseException':
-                print(f"Table {table_config['TableName']} already exists")
-            else:
-                print(f"Error creating table {table_config['TableName']}: {e}")
+    """Initialize tables"""
+    get_storage().init()
 
 async def seed_data():
     """Seed initial data"""
-    boards_table = dynamodb.Table('boards')
-    columns_table = dynamodb.Table('columns')
-    tickets_table = dynamodb.Table('tickets')
-    
-    # Check if data already exists
-    try:
-        response = boards_table.scan(Limit=1)
-        if response['Items']:
-            print("Data already seeded")
-            return
-    except:
-        pass
-    
-    # Create default board
-    board_id = "default-board"
-    board_data = {
-        'id': board_id,
-        'name': 'Opus1 Task Board',
-        'created_at': datetime.utcnow().isoformat(),
-    }
-    boards_table.put_item(Item=board_data)
-    
-    # Create default columns
-    columns_data = [
-        {'id': 'col-1', 'board_id': board_id, 'name': 'To Do', 'position': 0},
-        {'id': 'col-2', 'board_id': board_id, 'name': 'In Progress', 'position': 1},
-        {'id': 'col-3', 'board_id': board_id, 'name': 'Done', 'position': 2}
-    ]
-    
-    for col in columns_data:
-        col['created_at'] = datetime.utcnow().isoformat()
-        columns_table.put_item(Item=col)
-    
-    # Create sample tickets
-    tickets_data = [
-        {'id': 'ticket-1', 'column_id': 'col-1', 'title': 'Prompt LLM to init', 'description': 'Use bolt.new to provide quick greenfield project', 'position': 0},
-        {'id': 'ticket-2', 'column_id': 'col-1', 'title': 'Make adjustments', 'description': 'Adjust LLM code where appropriate', 'position': 1},
-        {'id': 'ticket-3', 'column_id': 'col-2', 'title': 'Go for a walk', 'description': 'Grab some water, too', 'position': 0},
-        {'id': 'ticket-4', 'column_id': 'col-3', 'title': 'Prompt LLM to write test cases', 'description': 'Use bolt.new for initial tests', 'position': 0},
-        {'id': 'ticket-5', 'column_id': 'col-3', 'title': 'Fix LLMS test cases', 'description': 'Struggling with best practices', 'position': 1},
-        {'id': 'ticket-6', 'column_id': 'col-3', 'title': 'Test e2e', 'description': 'Dont forget different browsers', 'position': 2},
-        {'id': 'ticket-7', 'column_id': 'col-3', 'title': 'Document work', 'description': 'Include next steps & tech debt', 'position': 3}
-    ]
-    
-    for ticket in tickets_data:
-        ticket['created_at'] = datetime.utcnow().isoformat()
-        tickets_table.put_item(Item=ticket)
-    
-    print("Seeded initial data successfully")
+    get_storage().seed()
 
 def get_tables():
-    tables = dynamodb_client.list_tables()
-    if 'TableNames' in tables:
-        return tables
-    else:
-        return []
+    return get_storage().get_tables()
+
 """
 BOARDS - create all CRUD operations for boards
 """
 def get_boards():
-    table = dynamodb.Table('boards')
-    response = table.scan()
-    return response['Items']
+    return get_storage().get_boards()
 
 def get_board(board_id):
-    table = dynamodb.Table('boards')
-    response = table.get_item(Key={'id': board_id})
-    return response.get('Item')
+    return get_storage().get_board(board_id)
 
 def update_board(board_id, name):
-    table = dynamodb.Table('boards')
-    response = table.update_item(
-        Key={'id': board_id},
-        UpdateExpression='SET #name = :name',
-        ExpressionAttributeNames={'#name': 'name'},
-        ExpressionAttributeValues={':name': name},
-        ReturnValues='ALL_NEW'
-    )
-    return response['Attributes']
-
-def create_board(name, id=None):
-    if not id:
-        id = str(uuid.uuid4())
-    table = dynamodb.Table('boards')
-    item = {
-        'id': id,
-        'name': name,
-        'created_at': datetime.utcnow().isoformat()
-    }
-    table.put_item(Item=item)
-    return item
+    return get_storage().update_board(board_id, name)
+
+def create_board(name, id=None, shard_count=None):
+    return get_storage().create_board(name, id, shard_count)
 
 def delete_board(board_id):
-    # First get all columns in this board delete all tickets in  column
-    columns_table = dynamodb.Table('columns')
-    boards_table = dynamodb.Table('boards')
-
-    column_data = columns_table.query(
-        IndexName='board_id-index',
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('board_id').eq(board_id)
-    )
-    # loop thru column data to get ticket data/column, delete tickets, then delete column, then delete board
-    if 'Items' in column_data and column_data['Items']:
-        for column in column_data['Items']:
-            delete_column(column['id'])
-
-    boards_table.delete_item(Key={'id': board_id})
-    return True
+    return get_storage().delete_board(board_id)
+
+def get_board_summaries():
+    return get_storage().get_board_summaries()
 
 """
 COLUMNS - CRUD operations for columns table
 """
-def get_columns_by_board(board_id):
-    table = dynamodb.Table('columns')
-    response = table.query(
-        IndexName='board_id-index',
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('board_id').eq(board_id)
-    )
-    items = response['Items']
-    return sorted(items, key=lambda x: x['position'])
+def get_column(column_id):
+    return get_storage().get_column(column_id)
+
+def get_columns_by_board(board_id, attributes=None):
+    return get_storage().get_columns_by_board(board_id, attributes)
 
 def create_column(board_id, name, position):
-    table = dynamodb.Table('columns')
-    column_id = str(uuid.uuid4())
-    item = {
-        'id': column_id,
-        'board_id': board_id,
-        'name': name,
-        'position': position,
-        'created_at': datetime.utcnow().isoformat()
-    }
-    table.put_item(Item=item)
-    return item
+    return get_storage().create_column(board_id, name, position)
 
 def update_column(column_id, name=None, position=None):
-    table = dynamodb.Table('columns')
-    update_expression = []
-    expression_values = {}
-    expression_names = {}
-    
-    if name is not None:
-        update_expression.append('#name = :name')
-        expression_names['#name'] = 'name'
-        expression_values[':name'] = name
-    
-    if position is not None:
-        update_expression.append('#position = :position')
-        expression_names['#position'] = 'position'
-        expression_values[':position'] = position
-    
-    response = table.update_item(
-        Key={'id': column_id},
-        UpdateExpression='SET ' + ', '.join(update_expression),
-        ExpressionAttributeNames=expression_names,
-        ExpressionAttributeValues=expression_values,
-        ReturnValues='ALL_NEW'
-    )
-    return response['Attributes']
+    return get_storage().update_column(column_id, name, position)
 
 def delete_column(column_id):
-    # First delete all tickets in this column
-    tickets_table = dynamodb.Table('tickets')
-    response = tickets_table.query(
-        IndexName='column_id-index',
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('column_id').eq(column_id)
-    )
-    
-    for ticket in response['Items']:
-        tickets_table.delete_item(Key={'id': ticket['id']})
-    
-    # Then delete the column
-    columns_table = dynamodb.Table('columns')
-    columns_table.delete_item(Key={'id': column_id})
-    return True
+    return get_storage().delete_column(column_id)
 
 """
 TICKETS - CRUD operations for tickets table
 """
+def get_ticket(ticket_id):
+    return get_storage().get_ticket(ticket_id)
 
-def get_tickets_by_column(column_id):
-    table = dynamodb.Table('tickets')
-    response = table.query(
-        IndexName='column_id-index',
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('column_id').eq(column_id)
-    )
-    items = response['Items']
-    return sorted(items, key=lambda x: x['position'])
+def get_tickets_by_column(column_id, attributes=None):
+    return get_storage().get_tickets_by_column(column_id, attributes)
 
 def create_ticket(column_id, title, description, position):
-    table = dynamodb.Table('tickets')
-    ticket_id = str(uuid.uuid4())
-    item = {
-        'id': ticket_id,
-        'column_id': column_id,
-        'title': title,
-        'description': description,
-        'position': position,
-        'created_at': datetime.utcnow().isoformat()
-    }
-    table.put_item(Item=item)
-    return item
+    return get_storage().create_ticket(column_id, title, description, position)
 
 def update_ticket(ticket_id, title=None, description=None, column_id=None, position=None):
-    table = dynamodb.Table('tickets')
-    update_expression = []
-    expression_values = {}
-    expression_names = {}
-    
-    if title is not None:
-        update_expression.append('#title = :title')
-        expression_names['#title'] = 'title'
-        expression_values[':title'] = title
-    
-    if description is not None:
-        update_expression.append('#description = :description')
-        expression_names['#description'] = 'description'
-        expression_values[':description'] = description
-    
-    if column_id is not None:
-        update_expression.append('column_id = :column_id')
-        expression_values[':column_id'] = column_id
-    
-    if position is not None:
-        update_expression.append('#position = :position')
-        expression_names['#position'] = 'position'
-        expression_values[':position'] = position
-    
-    response = table.update_item(
-        Key={'id': ticket_id},
-        UpdateExpression='SET ' + ', '.join(update_expression),
-        ExpressionAttributeNames=expression_names,
-        ExpressionAttributeValues=expression_values,
-        ReturnValues='ALL_NEW'
-    )
-    return response['Attributes']
+    return get_storage().update_ticket(ticket_id, title, description, column_id, position)
 
 def delete_ticket(ticket_id):
-    table = dynamodb.Table('tickets')
-    table.delete_item(Key={'id': ticket_id})
-    return True
+    return get_storage().delete_ticket(ticket_id)
 
-def get_all_tickets_by_board(board_id):
+def get_all_tickets_by_board(board_id, attributes=None):
     """Get all tickets for a board by first getting all columns, then all tickets"""
-    columns = get_columns_by_board(board_id)
-    all_tickets = []
-    
-    for column in columns:
-        tickets = get_tickets_by_column(column['id'])
-        all_tickets.extend(tickets)
-    
-    return all_tickets
\ No newline at end of file
+    return get_storage().get_all_tickets_by_board(board_id, attributes)
+
+"""
+ARCHIVE - archived tickets live in their own table with a TTL
+"""
+def archive_ticket(ticket_id):
+    return get_storage().archive_ticket(ticket_id)
+
+def get_archived_tickets(board_id, limit=50, cursor=None):
+    return get_storage().get_archived_tickets(board_id, limit, cursor)
+
+def auto_archive(board_id, older_than_days=None):
+    return get_storage().auto_archive(board_id, older_than_days)
+
+def run_auto_archive():
+    """Apply the auto-archive policy to every board"""
+    archived = 0
+    for board in get_boards():
+        archived += auto_archive(board['id'])
+    return archived
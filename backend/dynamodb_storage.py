@@ -0,0 +1,558 @@
+import boto3
+import heapq
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+import uuid
+from profiling import instrument_boto3, profiled
+from storage import Storage, now, archived_item, encode_cursor, decode_cursor, projected, board_shard_count
+
+TABLES = [
+    {
+        'TableName': 'boards',
+        'KeySchema': [
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'id', 'AttributeType': 'S'}
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    {
+        'TableName': 'columns',
+        'KeySchema': [
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'board_id', 'AttributeType': 'S'}
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'board_id-index',
+                'KeySchema': [
+                    {'AttributeName': 'board_id', 'KeyType': 'HASH'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    {
+        'TableName': 'tickets',
+        'KeySchema': [
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'column_id', 'AttributeType': 'S'}
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'column_id-index',
+                'KeySchema': [
+                    {'AttributeName': 'column_id', 'KeyType': 'HASH'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    {
+        'TableName': 'archived_tickets',
+        'KeySchema': [
+            {'AttributeName': 'id', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'board_id', 'AttributeType': 'S'},
+            {'AttributeName': 'archived_at', 'AttributeType': 'S'}
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'board_id-archived_at-index',
+                'KeySchema': [
+                    {'AttributeName': 'board_id', 'KeyType': 'HASH'},
+                    {'AttributeName': 'archived_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    }
+]
+
+# Archived tickets are removed by DynamoDB once this epoch-seconds attribute passes
+ARCHIVE_TTL_ATTRIBUTE = 'expires_at'
+
+# Write sharding - a board with shard_count > 1 stores its columns' board_id as
+# '<board_id>#<shard>' and its tickets' column_id as '<column_id>#<shard>', so
+# the board_id-index and column_id-index writes spread over shard_count
+# partitions. Reads query every shard and merge the results.
+SHARD_QUERY_WORKERS = int(os.getenv('SHARD_QUERY_WORKERS', '8'))
+# Most recently used board/column shard counts kept in memory
+SHARD_COUNT_CACHE_SIZE = int(os.getenv('SHARD_COUNT_CACHE_SIZE', '10000'))
+
+
+def shard_key(parent_id, item_id, shard_count):
+    """GSI partition key for item_id under parent_id, the plain id when unsharded"""
+    if shard_count <= 1:
+        return parent_id
+    return f"{parent_id}#{zlib.crc32(item_id.encode()) % shard_count}"
+
+
+def unshard(item, key):
+    """Strip the shard suffix from item[key]"""
+    if item and isinstance(item.get(key), str):
+        item[key] = item[key].split('#', 1)[0]
+    return item
+
+
+def projection_args(attributes):
+    """ProjectionExpression for attributes, aliased since names like 'name' and 'position' are reserved"""
+    if not attributes:
+        return {}
+    names = {f'#p{i}': attribute for i, attribute in enumerate(attributes)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+
+class DynamoDBStorage(Storage):
+    """Storage engine backed by DynamoDB (DynamoDB Local in docker compose)"""
+
+    def __init__(self, endpoint_url=None):
+        self.endpoint_url = endpoint_url or os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000')
+        # boto3 clients are thread-safe but resources are not, so each
+        # thread (e.g. batched operations) gets its own resource
+        self.local = threading.local()
+        self.dynamodb_client = boto3.client('dynamodb', endpoint_url=self.endpoint_url)
+        instrument_boto3(self.dynamodb_client)
+        # Shard counts never change after a board is created, so the most
+        # recently used ones are cached
+        self.shard_counts = OrderedDict()
+        self.shard_counts_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=SHARD_QUERY_WORKERS)
+
+    @property
+    def dynamodb(self):
+        resource = getattr(self.local, 'dynamodb', None)
+        if resource is None:
+            resource = self.local.dynamodb = boto3.session.Session().resource('dynamodb', endpoint_url=self.endpoint_url)
+            instrument_boto3(resource.meta.client)
+        return resource
+
+    def table(self, name):
+        return self.dynamodb.Table(name)
+
+    def shard_count(self, table_name, item_id):
+        """Shard count of a board, or of the board a column belongs to"""
+        key = (table_name, item_id)
+        with self.shard_counts_lock:
+            if key in self.shard_counts:
+                self.shard_counts.move_to_end(key)
+                return self.shard_counts[key]
+        item = self.table(table_name).get_item(Key={'id': item_id}, ProjectionExpression='shard_count').get('Item')
+        if not item:
+            return 1
+        return self.cache_shard_count(key, int(item.get('shard_count', 1)))
+
+    def cache_shard_count(self, key, shard_count):
+        with self.shard_counts_lock:
+            self.shard_counts[key] = shard_count
+            self.shard_counts.move_to_end(key)
+            if len(self.shard_counts) > SHARD_COUNT_CACHE_SIZE:
+                self.shard_counts.popitem(last=False)
+        return shard_count
+
+    def forget_shard_count(self, key):
+        with self.shard_counts_lock:
+            self.shard_counts.pop(key, None)
+
+    def query_partition(self, table_name, index_name, key_name, key, attributes):
+        response = self.table(table_name).query(
+            IndexName=index_name,
+            KeyConditionExpression=Key(key_name).eq(key),
+            **projection_args(attributes)
+        )
+        return sorted(response['Items'], key=lambda x: x['position'])
+
+    def query_shards(self, table_name, index_name, key_name, parent_id, shard_count, attributes=None):
+        """Query every shard of parent_id in parallel and merge-sort the results by position"""
+        if shard_count <= 1:
+            return self.query_partition(table_name, index_name, key_name, parent_id, attributes)
+        futures = [
+            self.executor.submit(
+                copy_context().run, profiled(self.query_partition), table_name, index_name, key_name, f"{parent_id}#{shard}", attributes
+            )
+            for shard in range(shard_count)
+        ]
+        return list(heapq.merge(*(future.result() for future in futures), key=lambda x: x['position']))
+
+    def init(self):
+        """Initialize DynamoDB tables"""
+        for table_config in TABLES:
+            try:
+                self.dynamodb_client.create_table(**table_config)
+                print(f"Created table: {table_config['TableName']}")
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ResourceInUseException':
+                    print(f"Table {table_config['TableName']} already exists")
+                else:
+                    print(f"Error creating table {table_config['TableName']}: {e}")
+
+        try:
+            self.dynamodb_client.update_time_to_live(
+                TableName='archived_tickets',
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': ARCHIVE_TTL_ATTRIBUTE}
+            )
+        except ClientError as e:
+            # raised when TTL is already enabled
+            if e.response['Error']['Code'] != 'ValidationException':
+                print(f"Error enabling TTL on archived_tickets: {e}")
+
+    def get_tables(self):
+        tables = self.dynamodb_client.list_tables()
+        if 'TableNames' in tables:
+            return tables
+        else:
+            return []
+
+    def seed(self):
+        try:
+            response = self.table('boards').scan(Limit=1)
+            if response['Items']:
+                print("Data already seeded")
+                return
+        except ClientError:
+            pass
+        super().seed()
+
+    """
+    BOARDS - create all CRUD operations for boards
+    """
+    def get_boards(self):
+        response = self.table('boards').scan()
+        return response['Items']
+
+    def get_board(self, board_id):
+        response = self.table('boards').get_item(Key={'id': board_id})
+        return response.get('Item')
+
+    def update_board(self, board_id, name):
+        response = self.table('boards').update_item(
+            Key={'id': board_id},
+            UpdateExpression='SET #name = :name',
+            ExpressionAttributeNames={'#name': 'name'},
+            ExpressionAttributeValues={':name': name},
+            ReturnValues='ALL_NEW'
+        )
+        return response['Attributes']
+
+    def create_board(self, name, id=None, shard_count=None):
+        if not id:
+            id = str(uuid.uuid4())
+        item = {
+            'id': id,
+            'name': name,
+            'ticket_count': 0,
+            'shard_count': board_shard_count(shard_count),
+            'created_at': now()
+        }
+        self.table('boards').put_item(Item=item)
+        self.cache_shard_count(('boards', id), item['shard_count'])
+        return item
+
+    def delete_board(self, board_id):
+        # First get all columns in this board delete all tickets in  column
+        # loop thru column data to get ticket data/column, delete tickets, then delete column, then delete board
+        for column in self.get_columns_by_board(board_id, ['id']):
+            self.delete_column(column['id'])
+
+        self.table('boards').delete_item(Key={'id': board_id})
+        self.forget_shard_count(('boards', board_id))
+        return True
+
+    def get_board_summaries(self):
+        # Counters live on the board items, so this never reads tickets
+        response = self.table('boards').scan(
+            ProjectionExpression='id, #name, ticket_count, last_modified',
+            ExpressionAttributeNames={'#name': 'name'}
+        )
+        return response['Items']
+
+    def adjust_board_count(self, board_id, delta, modified):
+        """Add delta to a board's ticket_count and stamp last_modified"""
+        try:
+            self.table('boards').update_item(
+                Key={'id': board_id},
+                UpdateExpression='ADD ticket_count :delta SET last_modified = :modified',
+                ConditionExpression='attribute_exists(ticket_count)',
+                ExpressionAttributeValues={':delta': delta, ':modified': modified}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # a board from before counters existed (or one that is gone)
+            if self.get_board(board_id):
+                count = len(self.get_all_tickets_by_board(board_id, ['id']))
+                self.backfill_count('boards', board_id, count, modified)
+
+    def stamp_board(self, board_id, modified):
+        """Set a board's last_modified without touching its ticket_count"""
+        try:
+            self.table('boards').update_item(
+                Key={'id': board_id},
+                UpdateExpression='SET last_modified = :modified',
+                ConditionExpression='attribute_exists(id)',
+                ExpressionAttributeValues={':modified': modified}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def backfill_count(self, table_name, item_id, count, modified):
+        """Set the ticket_count of an item that has none yet to its actual ticket count"""
+        try:
+            self.table(table_name).update_item(
+                Key={'id': item_id},
+                UpdateExpression='SET ticket_count = :count, last_modified = :modified',
+                ConditionExpression='attribute_exists(id) AND attribute_not_exists(ticket_count)',
+                ExpressionAttributeValues={':count': count, ':modified': modified}
+            )
+        except ClientError as e:
+            # another request backfilled it first
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    """
+    COLUMNS - CRUD operations for columns table
+    """
+    def get_column(self, column_id):
+        response = self.table('columns').get_item(Key={'id': column_id})
+        return unshard(response.get('Item'), 'board_id')
+
+    def get_columns_by_board(self, board_id, attributes=None):
+        items = self.query_shards(
+            'columns', 'board_id-index', 'board_id', board_id,
+            self.shard_count('boards', board_id), projected(attributes, 'id', 'position')
+        )
+        return [unshard(item, 'board_id') for item in items]
+
+    def create_column(self, board_id, name, position, id=None):
+        if not id:
+            id = str(uuid.uuid4())
+        shard_count = self.shard_count('boards', board_id)
+        item = {
+            'id': id,
+            'board_id': board_id,
+            'name': name,
+            'position': position,
+            'ticket_count': 0,
+            'shard_count': shard_count,
+            'created_at': now()
+        }
+        self.table('columns').put_item(Item={**item, 'board_id': shard_key(board_id, id, shard_count)})
+        self.cache_shard_count(('columns', id), shard_count)
+        return item
+
+    def update_column(self, column_id, name=None, position=None):
+        update_expression = []
+        expression_values = {}
+        expression_names = {}
+
+        if name is not None:
+            update_expression.append('#name = :name')
+            expression_names['#name'] = 'name'
+            expression_values[':name'] = name
+
+        if position is not None:
+            update_expression.append('#position = :position')
+            expression_names['#position'] = 'position'
+            expression_values[':position'] = position
+
+        response = self.table('columns').update_item(
+            Key={'id': column_id},
+            UpdateExpression='SET ' + ', '.join(update_expression),
+            ExpressionAttributeNames=expression_names,
+            ExpressionAttributeValues=expression_values,
+            ReturnValues='ALL_NEW'
+        )
+        return unshard(response['Attributes'], 'board_id')
+
+    def delete_column(self, column_id):
+        # First delete all tickets in this column
+        tickets_table = self.table('tickets')
+        tickets = self.get_tickets_by_column(column_id, ['id'])
+
+        for ticket in tickets:
+            tickets_table.delete_item(Key={'id': ticket['id']})
+
+        # Then delete the column and take its tickets off the board count
+        column = self.table('columns').delete_item(Key={'id': column_id}, ReturnValues='ALL_OLD').get('Attributes')
+        self.forget_shard_count(('columns', column_id))
+        if column and tickets:
+            self.adjust_board_count(unshard(column, 'board_id')['board_id'], -len(tickets), now())
+        return True
+
+    def adjust_column_count(self, column_id, delta, modified):
+        """Add delta to a column's ticket_count and stamp last_modified, returning its board_id"""
+        try:
+            response = self.table('columns').update_item(
+                Key={'id': column_id},
+                UpdateExpression='ADD ticket_count :delta SET last_modified = :modified',
+                ConditionExpression='attribute_exists(ticket_count)',
+                ExpressionAttributeValues={':delta': delta, ':modified': modified},
+                ReturnValues='ALL_NEW'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # a column from before counters existed (or one that is gone);
+            # the ticket write has landed, so counting gives the new total
+            column = self.get_column(column_id)
+            if column is None:
+                return None
+            self.backfill_count('columns', column_id, len(self.get_tickets_by_column(column_id, ['id'])), modified)
+            return column['board_id']
+        return unshard(response['Attributes'], 'board_id')['board_id']
+
+    """
+    TICKETS - CRUD operations for tickets table
+    """
+    def get_ticket(self, ticket_id):
+        response = self.table('tickets').get_item(Key={'id': ticket_id})
+        return unshard(response.get('Item'), 'column_id')
+
+    def get_tickets_by_column(self, column_id, attributes=None):
+        items = self.query_shards(
+            'tickets', 'column_id-index', 'column_id', column_id,
+            self.shard_count('columns', column_id), projected(attributes, 'id', 'column_id', 'position')
+        )
+        return [unshard(item, 'column_id') for item in items]
+
+    def create_ticket(self, column_id, title, description, position, id=None):
+        if not id:
+            id = str(uuid.uuid4())
+        item = {
+            'id': id,
+            'column_id': column_id,
+            'title': title,
+            'description': description,
+            'position': position,
+            'created_at': now()
+        }
+        stored_column_id = shard_key(column_id, id, self.shard_count('columns', column_id))
+        self.table('tickets').put_item(Item={**item, 'column_id': stored_column_id})
+        self.count_ticket_move(None, column_id)
+        return item
+
+    def update_ticket(self, ticket_id, title=None, description=None, column_id=None, position=None):
+        update_expression = ['#updated_at = :updated_at']
+        expression_values = {':updated_at': now()}
+        expression_names = {'#updated_at': 'updated_at'}
+
+        if title is not None:
+            update_expression.append('#title = :title')
+            expression_names['#title'] = 'title'
+            expression_values[':title'] = title
+
+        if description is not None:
+            update_expression.append('#description = :description')
+            expression_names['#description'] = 'description'
+            expression_values[':description'] = description
+
+        if column_id is not None:
+            update_expression.append('#column_id = :column_id')
+            expression_names['#column_id'] = 'column_id'
+            expression_values[':column_id'] = shard_key(column_id, ticket_id, self.shard_count('columns', column_id))
+
+        if position is not None:
+            update_expression.append('#position = :position')
+            expression_names['#position'] = 'position'
+            expression_values[':position'] = position
+
+        if column_id is None:
+            response = self.table('tickets').update_item(
+                Key={'id': ticket_id},
+                UpdateExpression='SET ' + ', '.join(update_expression),
+                ExpressionAttributeNames=expression_names,
+                ExpressionAttributeValues=expression_values,
+                ReturnValues='ALL_NEW'
+            )
+            return unshard(response['Attributes'], 'column_id')
+
+        # A possible column move needs the old column, which ALL_OLD gives us
+        # in the same write; the new item is the old one plus our SETs
+        response = self.table('tickets').update_item(
+            Key={'id': ticket_id},
+            UpdateExpression='SET ' + ', '.join(update_expression),
+            ExpressionAttributeNames=expression_names,
+            ExpressionAttributeValues=expression_values,
+            ReturnValues='ALL_OLD'
+        )
+        old = unshard(response.get('Attributes', {}), 'column_id')
+        item = {**old, 'id': ticket_id}
+        for name in expression_names.values():
+            item[name] = expression_values[':' + name]
+        item['column_id'] = column_id
+        if old.get('column_id') != column_id:
+            self.count_ticket_move(old.get('column_id'), column_id)
+        return item
+
+    def delete_ticket(self, ticket_id):
+        response = self.table('tickets').delete_item(Key={'id': ticket_id}, ReturnValues='ALL_OLD')
+        ticket = unshard(response.get('Attributes'), 'column_id')
+        if ticket:
+            self.count_ticket_move(ticket['column_id'], None)
+        return True
+
+    def count_ticket_move(self, from_column_id, to_column_id):
+        """Keep column and board counters in step with a ticket leaving and/or entering a column"""
+        modified = now()
+        from_board_id = to_board_id = None
+        if from_column_id:
+            from_board_id = self.adjust_column_count(from_column_id, -1, modified)
+        if to_column_id:
+            to_board_id = self.adjust_column_count(to_column_id, 1, modified)
+        if from_board_id == to_board_id:
+            # a move within a board leaves its count alone, but is still activity
+            if to_board_id:
+                self.stamp_board(to_board_id, modified)
+            return
+        if from_board_id:
+            self.adjust_board_count(from_board_id, -1, modified)
+        if to_board_id:
+            self.adjust_board_count(to_board_id, 1, modified)
+
+    """
+    ARCHIVE - archived_tickets table, expired by DynamoDB TTL
+    """
+    def archive_ticket(self, ticket_id):
+        ticket = self.get_ticket(ticket_id)
+        if not ticket:
+            return None
+        item = archived_item(ticket, self.get_column(ticket['column_id']))
+        # Write the archive copy before deleting so a failure can't lose the ticket
+        self.table('archived_tickets').put_item(Item=item)
+        self.delete_ticket(ticket_id)
+        return item
+
+    def get_archived_tickets(self, board_id, limit=50, cursor=None):
+        query = {
+            'IndexName': 'board_id-archived_at-index',
+            'KeyConditionExpression': Key('board_id').eq(board_id),
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if cursor:
+            query['ExclusiveStartKey'] = decode_cursor(cursor)
+        response = self.table('archived_tickets').query(**query)
+        last_key = response.get('LastEvaluatedKey')
+        return response['Items'], encode_cursor(last_key) if last_key else None
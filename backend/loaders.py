@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+
+def freeze(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+class RequestLoaders:
+    """
+    Read cache for one HTTP request, shared by every operation in a batch.
+    Concurrent loads of the same read wait for a single storage call, and
+    any mutation clears the cache so later operations see its writes.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache = {}
+
+    def load(self, fn, *args, **kwargs):
+        key = (fn, tuple(freeze(arg) for arg in args), tuple(sorted((k, freeze(v)) for k, v in kwargs.items())))
+        with self.lock:
+            future = self.cache.get(key)
+            owner = future is None
+            if owner:
+                future = self.cache[key] = Future()
+
+        if owner:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                with self.lock:
+                    self.cache.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+
+async def get_context():
+    """GraphQLRouter context_getter, gives each request its own loaders"""
+    return {'loaders': RequestLoaders()}
+
+
+def loaders_from(info):
+    if info is None or not isinstance(info.context, dict):
+        return None
+    return info.context.get('loaders')
+
+
+def load(info, fn, *args, **kwargs):
+    """Call a database read through the request's loaders, if it has any"""
+    loaders = loaders_from(info)
+    if loaders is None:
+        return fn(*args, **kwargs)
+    return loaders.load(fn, *args, **kwargs)
+
+
+class InvalidateLoaders(SchemaExtension):
+    """Clear the request's loaders once a mutation operation has run"""
+    def on_execute(self):
+        yield
+        context = self.execution_context.context
+        if isinstance(context, dict) and context.get('loaders') is not None:
+            if self.execution_context.operation_type == OperationType.MUTATION:
+                context['loaders'].clear()
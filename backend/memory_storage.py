@@ -0,0 +1,246 @@
+import threading
+import uuid
+from storage import Storage, now, archived_item, encode_cursor, decode_cursor, projected, project, board_shard_count
+
+
+class InMemoryStorage(Storage):
+    """
+    Storage engine keeping every table in process memory, for tests and
+    benchmarks. Columns are indexed by board and tickets by column (dicts
+    used as ordered sets), mirroring the board_id-index and column_id-index
+    GSIs. Items are copied on the way in and out so callers can't mutate
+    stored state, as with DynamoDB.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.boards = {}
+        self.columns = {}
+        self.tickets = {}
+        self.columns_by_board = {}
+        self.tickets_by_column = {}
+        self.archived_tickets = {}
+        self.archived_by_board = {}
+
+    def init(self):
+        pass
+
+    def get_tables(self):
+        return {'TableNames': ['boards', 'columns', 'tickets', 'archived_tickets']}
+
+    """
+    BOARDS
+    """
+    def get_boards(self):
+        with self.lock:
+            return [dict(board) for board in self.boards.values()]
+
+    def get_board(self, board_id):
+        with self.lock:
+            board = self.boards.get(board_id)
+            return dict(board) if board else None
+
+    def create_board(self, name, id=None, shard_count=None):
+        # shard_count only changes the DynamoDB key layout, it is kept for parity
+        if not id:
+            id = str(uuid.uuid4())
+        item = {
+            'id': id,
+            'name': name,
+            'ticket_count': 0,
+            'shard_count': board_shard_count(shard_count),
+            'created_at': now()
+        }
+        with self.lock:
+            self.boards[id] = item
+            return dict(item)
+
+    def update_board(self, board_id, name):
+        with self.lock:
+            board = self.boards.setdefault(board_id, {'id': board_id})
+            board['name'] = name
+            return dict(board)
+
+    def delete_board(self, board_id):
+        with self.lock:
+            for column_id in list(self.columns_by_board.get(board_id, ())):
+                self.delete_column(column_id)
+            self.columns_by_board.pop(board_id, None)
+            self.boards.pop(board_id, None)
+            return True
+
+    def get_board_summaries(self):
+        with self.lock:
+            return [
+                {key: board[key] for key in ('id', 'name', 'ticket_count', 'last_modified') if key in board}
+                for board in self.boards.values()
+            ]
+
+    def adjust_count(self, item, delta, modified, count):
+        """Add delta to item's ticket_count, or set it from count() if it has none yet"""
+        if item is not None:
+            if 'ticket_count' in item:
+                item['ticket_count'] += delta
+            else:
+                item['ticket_count'] = count()
+            item['last_modified'] = modified
+
+    def count_tickets(self, board_id):
+        return sum(len(self.tickets_by_column.get(column_id, ())) for column_id in self.columns_by_board.get(board_id, ()))
+
+    """
+    COLUMNS
+    """
+    def get_column(self, column_id):
+        with self.lock:
+            column = self.columns.get(column_id)
+            return dict(column) if column else None
+
+    def get_columns_by_board(self, board_id, attributes=None):
+        attributes = projected(attributes, 'id', 'position')
+        with self.lock:
+            items = [project(dict(self.columns[column_id]), attributes) for column_id in self.columns_by_board.get(board_id, ())]
+        return sorted(items, key=lambda x: x['position'])
+
+    def create_column(self, board_id, name, position, id=None):
+        if not id:
+            id = str(uuid.uuid4())
+        item = {
+            'id': id,
+            'board_id': board_id,
+            'name': name,
+            'position': position,
+            'ticket_count': 0,
+            'created_at': now()
+        }
+        with self.lock:
+            item['shard_count'] = self.boards.get(board_id, {}).get('shard_count', 1)
+            self.columns[id] = item
+            self.columns_by_board.setdefault(board_id, {})[id] = None
+            return dict(item)
+
+    def update_column(self, column_id, name=None, position=None):
+        with self.lock:
+            column = self.columns.setdefault(column_id, {'id': column_id})
+            if name is not None:
+                column['name'] = name
+            if position is not None:
+                column['position'] = position
+            return dict(column)
+
+    def delete_column(self, column_id):
+        with self.lock:
+            ticket_ids = self.tickets_by_column.pop(column_id, {})
+            for ticket_id in ticket_ids:
+                self.tickets.pop(ticket_id, None)
+            column = self.columns.pop(column_id, None)
+            if column:
+                self.columns_by_board.get(column['board_id'], {}).pop(column_id, None)
+                if ticket_ids:
+                    self.adjust_count(
+                        self.boards.get(column['board_id']), -len(ticket_ids), now(), lambda: self.count_tickets(column['board_id'])
+                    )
+            return True
+
+    """
+    TICKETS
+    """
+    def get_ticket(self, ticket_id):
+        with self.lock:
+            ticket = self.tickets.get(ticket_id)
+            return dict(ticket) if ticket else None
+
+    def get_tickets_by_column(self, column_id, attributes=None):
+        attributes = projected(attributes, 'id', 'column_id', 'position')
+        with self.lock:
+            items = [project(dict(self.tickets[ticket_id]), attributes) for ticket_id in self.tickets_by_column.get(column_id, ())]
+        return sorted(items, key=lambda x: x['position'])
+
+    def create_ticket(self, column_id, title, description, position, id=None):
+        if not id:
+            id = str(uuid.uuid4())
+        item = {
+            'id': id,
+            'column_id': column_id,
+            'title': title,
+            'description': description,
+            'position': position,
+            'created_at': now()
+        }
+        with self.lock:
+            self.tickets[id] = item
+            self.tickets_by_column.setdefault(column_id, {})[id] = None
+            self.count_ticket_move(None, column_id)
+            return dict(item)
+
+    def update_ticket(self, ticket_id, title=None, description=None, column_id=None, position=None):
+        with self.lock:
+            ticket = self.tickets.setdefault(ticket_id, {'id': ticket_id})
+            ticket['updated_at'] = now()
+            if title is not None:
+                ticket['title'] = title
+            if description is not None:
+                ticket['description'] = description
+            if column_id is not None and column_id != ticket.get('column_id'):
+                if 'column_id' in ticket:
+                    self.tickets_by_column.get(ticket['column_id'], {}).pop(ticket_id, None)
+                self.count_ticket_move(ticket.get('column_id'), column_id)
+                ticket['column_id'] = column_id
+                self.tickets_by_column.setdefault(column_id, {})[ticket_id] = None
+            if position is not None:
+                ticket['position'] = position
+            return dict(ticket)
+
+    def delete_ticket(self, ticket_id):
+        with self.lock:
+            ticket = self.tickets.pop(ticket_id, None)
+            if ticket and 'column_id' in ticket:
+                self.tickets_by_column.get(ticket['column_id'], {}).pop(ticket_id, None)
+                self.count_ticket_move(ticket['column_id'], None)
+            return True
+
+    def count_ticket_move(self, from_column_id, to_column_id):
+        modified = now()
+        boards = []
+        for column_id, delta in ((from_column_id, -1), (to_column_id, 1)):
+            column = self.columns.get(column_id)
+            if column is not None:
+                self.adjust_count(column, delta, modified, lambda: len(self.tickets_by_column.get(column_id, ())))
+                boards.append((column['board_id'], delta))
+        if len(boards) == 2 and boards[0][0] == boards[1][0]:
+            # a move within a board leaves its count alone, but is still activity
+            board = self.boards.get(boards[0][0])
+            if board is not None:
+                board['last_modified'] = modified
+            return
+        for board_id, delta in boards:
+            self.adjust_count(self.boards.get(board_id), delta, modified, lambda: self.count_tickets(board_id))
+
+    """
+    ARCHIVE - expiry isn't enforced in memory
+    """
+    def archive_ticket(self, ticket_id):
+        with self.lock:
+            ticket = self.tickets.get(ticket_id)
+            if not ticket:
+                return None
+            item = archived_item(ticket, self.columns.get(ticket.get('column_id')))
+            self.archived_tickets[ticket_id] = item
+            if 'board_id' in item:
+                self.archived_by_board.setdefault(item['board_id'], {})[ticket_id] = None
+            self.delete_ticket(ticket_id)
+            return dict(item)
+
+    def get_archived_tickets(self, board_id, limit=50, cursor=None):
+        with self.lock:
+            items = [self.archived_tickets[ticket_id] for ticket_id in self.archived_by_board.get(board_id, ())]
+        items = sorted(items, key=lambda x: (x['archived_at'], x['id']), reverse=True)
+        if cursor:
+            start = decode_cursor(cursor)
+            items = [item for item in items if (item['archived_at'], item['id']) < (start['archived_at'], start['id'])]
+        page = [dict(item) for item in items[:limit]]
+        next_cursor = None
+        if len(items) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor({'id': last['id'], 'board_id': board_id, 'archived_at': last['archived_at']})
+        return page, next_cursor
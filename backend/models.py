@@ -1,5 +1,5 @@
 import strawberry
-from typing import Optional
+from typing import List, Optional
 
 """
 TYPES
@@ -10,6 +10,16 @@ class Board:
     id: str
     name: str
     created_at: str
+    ticket_count: int = 0
+    last_modified: Optional[str] = None
+    shard_count: int = 1
+
+@strawberry.type
+class BoardSummary:
+    id: str
+    name: str
+    ticket_count: int = 0
+    last_modified: Optional[str] = None
 
 @strawberry.type
 class Column:
@@ -18,6 +28,9 @@ class Column:
     name: str
     position: int
     created_at: str
+    ticket_count: int = 0
+    last_modified: Optional[str] = None
+    shard_count: int = 1
 
 @strawberry.type
 class Ticket:
@@ -27,6 +40,27 @@ class Ticket:
     description: str
     position: int
     created_at: str
+    updated_at: Optional[str] = None
+
+@strawberry.type
+class ArchivedTicket:
+    id: str
+    column_id: str
+    column_name: str
+    title: str
+    description: str
+    position: int
+    created_at: str
+    archived_at: str
+    expires_at: int
+    updated_at: Optional[str] = None
+    # None when the ticket's column was already gone
+    board_id: Optional[str] = None
+
+@strawberry.type
+class ArchivedTicketPage:
+    items: List[ArchivedTicket]
+    next_cursor: Optional[str] = None
 
 """
 INPUTS
@@ -34,6 +68,7 @@ INPUTS
 @strawberry.input
 class CreateBoardInput:
     name: str
+    shard_count: Optional[int] = None
 
 @strawberry.input
 class CreateColumnInput:
@@ -0,0 +1,165 @@
+import cProfile
+import functools
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Profiling settings - a request is profiled when it sends X-Profile: PROFILE_TOKEN,
+# or at random for PROFILE_SAMPLE_RATE of requests. Profiles are written to
+# PROFILE_DIR when set; token requests also get a summary in the response extensions.
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '')
+PROFILE_TOP_N = int(os.getenv('PROFILE_TOP_N', '25'))
+
+_boto3_timings = ContextVar('boto3_timings', default=None)
+# cProfile profiles of worker threads doing work for the profiled request
+_thread_profiles = ContextVar('thread_profiles', default=None)
+_lock = threading.Lock()
+
+
+def instrument_boto3(client):
+    """Time every API call made by a boto3 client while a request is being profiled"""
+    def before_call(model, context, **kwargs):
+        if _boto3_timings.get() is not None:
+            # per call, concurrent calls (e.g. shard queries) each keep their own
+            context['profile_started'] = time.perf_counter()
+
+    def after_call(model, context, **kwargs):
+        timings = _boto3_timings.get()
+        started = context.pop('profile_started', None)
+        if timings is not None and started is not None:
+            elapsed = time.perf_counter() - started
+            with _lock:
+                operation = timings['operations'].setdefault(model.name, {'calls': 0, 'ms': 0.0})
+                operation['calls'] += 1
+                operation['ms'] += elapsed * 1000
+
+    client.meta.events.register('before-call.*.*', before_call)
+    client.meta.events.register('after-call.*.*', after_call)
+
+
+def profiled(fn):
+    """
+    Wrap fn so that, when a worker thread runs it for a profiled request,
+    the thread is profiled too. Hand the wrapper to asyncio.to_thread or an
+    executor (with the caller's context) in place of fn.
+    """
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        profiles = _thread_profiles.get()
+        if profiles is None or sys.getprofile() is not None:
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with _lock:
+                profiles.append(profile)
+    return run
+
+
+def format_stats(profiles, top_n):
+    stream = io.StringIO()
+    pstats.Stats(*profiles, stream=stream).sort_stats('cumulative').print_stats(top_n)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    cProfile one request at a time. The event loop thread is profiled,
+    along with every worker thread running a profiled() call for the
+    request (batched operations, shard queries), and the profiles are
+    merged. Time blocked on DynamoDB is also broken down per API operation.
+    Requests that arrive while another one is being profiled are served
+    normally, though their work on the event loop thread shows up in that
+    profile.
+    """
+    def __init__(self, app, token=PROFILE_TOKEN, sample_rate=PROFILE_SAMPLE_RATE, directory=PROFILE_DIR, top_n=PROFILE_TOP_N):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.top_n = top_n
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self.active:
+            await self.app(scope, receive, send)
+            return
+
+        header = Headers(scope=scope).get('x-profile', '')
+        requested = bool(self.token) and hmac.compare_digest(header.encode(), self.token.encode())
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not requested and not (sampled and self.directory):
+            await self.app(scope, receive, send)
+            return
+
+        # Buffer the response, the profile is only complete once the app returns
+        messages = []
+
+        async def collect(message):
+            messages.append(message)
+
+        profile = cProfile.Profile()
+        profiles = [profile]
+        timings = {'operations': {}}
+        token = _boto3_timings.set(timings)
+        profiles_token = _thread_profiles.set(profiles)
+        self.active = True
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, collect)
+            finally:
+                profile.disable()
+        finally:
+            self.active = False
+            _boto3_timings.reset(token)
+            _thread_profiles.reset(profiles_token)
+
+        summary = {
+            'wallMs': round((time.perf_counter() - started) * 1000, 3),
+            'threads': len(profiles),
+            'boto3': {name: {'calls': op['calls'], 'ms': round(op['ms'], 3)} for name, op in timings['operations'].items()},
+        }
+        if self.directory:
+            summary['file'] = self.dump(profiles)
+
+        if requested and len(messages) == 2 and not messages[1].get('more_body', False):
+            summary['stats'] = format_stats(profiles, self.top_n)
+            messages[1]['body'] = self.add_extensions(messages[0], messages[1].get('body', b''), summary)
+        for message in messages:
+            await send(message)
+
+    def dump(self, profiles):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof")
+        pstats.Stats(*profiles).dump_stats(path)
+        return path
+
+    def add_extensions(self, initial_message, body, summary):
+        """Add the profile summary to a JSON (GraphQL) response body"""
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return body
+        if not isinstance(payload, dict):
+            return body
+        payload.setdefault('extensions', {})['profile'] = summary
+        body = json.dumps(payload).encode()
+        MutableHeaders(raw=initial_message['headers'])['Content-Length'] = str(len(body))
+        return body
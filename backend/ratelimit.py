@@ -0,0 +1,173 @@
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# Rate limit settings
+RATE_LIMIT_PER_SECOND = float(os.getenv('RATE_LIMIT_PER_SECOND', '20'))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '40'))
+MAX_CONCURRENT_REQUESTS = int(os.getenv('MAX_CONCURRENT_REQUESTS', '64'))
+# Bound on tracked client/board buckets, least recently used are dropped first
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv('RATE_LIMIT_MAX_BUCKETS', '10000'))
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst"""
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, count=1):
+        """Take count tokens, returning 0 on success or the seconds until they are available"""
+        self.refill()
+        if self.tokens >= count:
+            self.tokens -= count
+            return 0
+        return (count - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets keyed by client/board"""
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST, max_buckets=RATE_LIMIT_MAX_BUCKETS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.buckets = OrderedDict()
+
+    def bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, self.clock)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def take(self, key, count=1):
+        return self.take_all({key: count})
+
+    def take_all(self, costs):
+        """Take costs[key] tokens from each key's bucket, all or nothing"""
+        buckets = {key: self.bucket(key) for key in costs}
+        wait = 0
+        for key, bucket in buckets.items():
+            bucket.refill()
+            if bucket.tokens < costs[key]:
+                wait = max(wait, (costs[key] - bucket.tokens) / self.rate)
+        if wait:
+            return wait
+        for key, bucket in buckets.items():
+            bucket.tokens -= costs[key]
+        return 0
+
+
+def board_ids_from_body(body):
+    """The boardId variable of each operation in a GraphQL request body (a batch has several)"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return [None]
+    operations = payload if isinstance(payload, list) else [payload]
+    board_ids = []
+    for operation in operations:
+        variables = operation.get('variables') if isinstance(operation, dict) else None
+        board_ids.append(variables.get('boardId') if isinstance(variables, dict) else None)
+    return board_ids or [None]
+
+
+def too_many_requests(message, retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    return JSONResponse(
+        {'errors': [{'message': message, 'extensions': {'code': 'RATE_LIMITED', 'retryAfter': retry_after}}]},
+        status_code=429,
+        headers={'Retry-After': str(retry_after)},
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Admission control in front of the GraphQL router. Each client/board pair
+    gets a token bucket, and at most max_concurrent requests run at once.
+    Anything over either limit gets an immediate 429 with a Retry-After hint
+    instead of queueing on the storage connection pool.
+
+    Clients are identified by the X-Client-Id header, falling back to the
+    peer address. A batch costs one token per operation, each charged to
+    its own board, and counts each operation against max_concurrent.
+    """
+    def __init__(self, app, path='/graphql', limiter=None, max_concurrent=MAX_CONCURRENT_REQUESTS):
+        self.app = app
+        self.path = path
+        self.limiter = limiter or RateLimiter()
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path) or scope['method'] == 'OPTIONS':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = headers.get('x-client-id') or (scope.get('client') or ('unknown',))[0]
+
+        # Buffer the (small) GraphQL body to find the board, then replay it
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        board_ids = board_ids_from_body(body) if body else [None]
+        costs = {}
+        for board_id in board_ids:
+            key = f"{client}:{board_id or '*'}"
+            costs[key] = costs.get(key, 0) + 1
+        if max(costs.values()) > self.limiter.burst:
+            # more operations for one board than its bucket can ever hold
+            await JSONResponse(
+                {'errors': [{'message': f'Batch exceeds the rate limit burst of {self.limiter.burst} operations per board'}]},
+                status_code=400,
+            )(scope, receive, send)
+            return
+        retry_after = self.limiter.take_all(costs)
+        if retry_after:
+            await too_many_requests('Rate limit exceeded', retry_after)(scope, receive, send)
+            return
+
+        # a batch bigger than the gate still runs on an otherwise idle server
+        weight = len(board_ids)
+        if self.in_flight and self.in_flight + weight > self.max_concurrent:
+            await too_many_requests('Server busy', 1)(scope, receive, send)
+            return
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        self.in_flight += weight
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            self.in_flight -= weight
@@ -1,9 +1,49 @@
+import dataclasses
+import re
 import strawberry
+from strawberry.types import Info
 from typing import List, Optional
 from models import (
-    Board, Column, Ticket, CreateColumnInput, UpdateColumnInput, CreateTicketInput, UpdateTicketInput, CreateBoardInput
+    ArchivedTicket, ArchivedTicketPage, Board, BoardSummary, Column, Ticket, CreateColumnInput, UpdateColumnInput, CreateTicketInput, UpdateTicketInput, CreateBoardInput
 )
 import database as db
+from loaders import load
+
+# Largest page archivedTickets returns, bigger limits are capped to it
+MAX_ARCHIVE_PAGE_SIZE = 100
+
+"""
+PROJECTIONS - only read the attributes the client selected
+"""
+def selected_attributes(selections):
+    names = set()
+    for selection in selections:
+        if getattr(selection, 'name', None) is None or not hasattr(selection, 'arguments'):
+            # fragment spreads and inline fragments
+            names |= selected_attributes(selection.selections)
+        else:
+            names.add(re.sub(r'(?<!^)(?=[A-Z])', '_', selection.name).lower())
+    return names
+
+def projection(info, model):
+    """attributes=... for the storage read when info selects a subset of model's fields"""
+    if info is None:
+        return {}
+    fields = {field.name for field in dataclasses.fields(model)}
+    attributes = selected_attributes(info.selected_fields[0].selections) & fields
+    if not attributes or attributes == fields:
+        return {}
+    return {'attributes': sorted(attributes)}
+
+def build(model, item):
+    """Build model from a possibly projected item, unselected fields are never serialized"""
+    # fields with defaults keep them, so items stored before a field existed still resolve
+    missing = {
+        field.name: None for field in dataclasses.fields(model)
+        if field.name not in item
+        and field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+    }
+    return model(**item, **missing)
 
 @strawberry.type
 class Query:
@@ -13,26 +53,38 @@ class Query:
         return [Board(**board) for board in boards_data]
     
     @strawberry.field
-    def board(self, id: str) -> Optional[Board]:
-        board_data = db.get_board(id)
+    def board(self, id: str, info: Info = None) -> Optional[Board]:
+        board_data = load(info, db.get_board, id)
         if board_data:
             return Board(**board_data)
         return None
     
     @strawberry.field
-    def columns(self, board_id: str) -> List[Column]:
-        columns_data = db.get_columns_by_board(board_id)
-        return [Column(**column) for column in columns_data]
+    def board_summaries(self) -> List[BoardSummary]:
+        summaries_data = db.get_board_summaries()
+        return [BoardSummary(**summary) for summary in summaries_data]
     
     @strawberry.field
-    def tickets(self, column_id: str) -> List[Ticket]:
-        tickets_data = db.get_tickets_by_column(column_id)
-        return [Ticket(**ticket) for ticket in tickets_data]
+    def columns(self, board_id: str, info: Info = None) -> List[Column]:
+        columns_data = load(info, db.get_columns_by_board, board_id, **projection(info, Column))
+        return [build(Column, column) for column in columns_data]
     
     @strawberry.field
-    def all_tickets(self, board_id: str) -> List[Ticket]:
-        tickets_data = db.get_all_tickets_by_board(board_id)
-        return [Ticket(**ticket) for ticket in tickets_data]
+    def tickets(self, column_id: str, info: Info = None) -> List[Ticket]:
+        tickets_data = load(info, db.get_tickets_by_column, column_id, **projection(info, Ticket))
+        return [build(Ticket, ticket) for ticket in tickets_data]
+    
+    @strawberry.field
+    def all_tickets(self, board_id: str, info: Info = None) -> List[Ticket]:
+        tickets_data = load(info, db.get_all_tickets_by_board, board_id, **projection(info, Ticket))
+        return [build(Ticket, ticket) for ticket in tickets_data]
+    
+    @strawberry.field
+    def archived_tickets(self, board_id: str, limit: int = 50, cursor: Optional[str] = None) -> ArchivedTicketPage:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        items, next_cursor = db.get_archived_tickets(board_id, min(limit, MAX_ARCHIVE_PAGE_SIZE), cursor)
+        return ArchivedTicketPage(items=[ArchivedTicket(**item) for item in items], next_cursor=next_cursor)
 
 @strawberry.type
 class Mutation:
@@ -43,7 +95,7 @@ class Mutation:
     
     @strawberry.mutation
     def create_board(self, input: CreateBoardInput) -> Board:
-        board_data = db.create_board(input.name)
+        board_data = db.create_board(input.name, shard_count=input.shard_count)
         return Board(**board_data)
     
     @strawberry.mutation
@@ -76,4 +128,15 @@ class Mutation:
     
     @strawberry.mutation
     def delete_ticket(self, id: str) -> bool:
-        return db.delete_ticket(id)
\ No newline at end of file
+        return db.delete_ticket(id)
+    
+    @strawberry.mutation
+    def archive_ticket(self, id: str) -> Optional[ArchivedTicket]:
+        archived_data = db.archive_ticket(id)
+        if archived_data:
+            return ArchivedTicket(**archived_data)
+        return None
+    
+    @strawberry.mutation
+    def auto_archive(self, board_id: str, older_than_days: Optional[int] = None) -> int:
+        return db.auto_archive(board_id, older_than_days)
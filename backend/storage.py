@@ -0,0 +1,226 @@
+import base64
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+"""
+STORAGE - interface every storage engine implements.
+Items are plain dicts with the same keys as the DynamoDB tables.
+"""
+
+SEED_BOARD = {'id': 'default-board', 'name': 'Opus1 Task Board'}
+
+SEED_COLUMNS = [
+    {'id': 'col-1', 'name': 'To Do', 'position': 0},
+    {'id': 'col-2', 'name': 'In Progress', 'position': 1},
+    {'id': 'col-3', 'name': 'Done', 'position': 2}
+]
+
+SEED_TICKETS = [
+    {'id': 'ticket-1', 'column_id': 'col-1', 'title': 'Prompt LLM to init', 'description': 'Use bolt.new to provide quick greenfield project', 'position': 0},
+    {'id': 'ticket-2', 'column_id': 'col-1', 'title': 'Make adjustments', 'description': 'Adjust LLM code where appropriate', 'position': 1},
+    {'id': 'ticket-3', 'column_id': 'col-2', 'title': 'Go for a walk', 'description': 'Grab some water, too', 'position': 0},
+    {'id': 'ticket-4', 'column_id': 'col-3', 'title': 'Prompt LLM to write test cases', 'description': 'Use bolt.new for initial tests', 'position': 0},
+    {'id': 'ticket-5', 'column_id': 'col-3', 'title': 'Fix LLMS test cases', 'description': 'Struggling with best practices', 'position': 1},
+    {'id': 'ticket-6', 'column_id': 'col-3', 'title': 'Test e2e', 'description': 'Dont forget different browsers', 'position': 2},
+    {'id': 'ticket-7', 'column_id': 'col-3', 'title': 'Document work', 'description': 'Include next steps & tech debt', 'position': 3}
+]
+
+
+# Archive settings - archived tickets expire (DynamoDB TTL) after ARCHIVE_TTL_DAYS,
+# auto-archive moves tickets in ARCHIVE_COLUMN_NAMES untouched for ARCHIVE_AFTER_DAYS
+ARCHIVE_TTL_DAYS = int(os.getenv('ARCHIVE_TTL_DAYS', '365'))
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '14'))
+ARCHIVE_COLUMN_NAMES = [name.strip() for name in os.getenv('ARCHIVE_COLUMN_NAMES', 'Done').split(',')]
+
+# Write sharding - boards spread their column/ticket index keys over
+# shard_count partitions (see dynamodb_storage). Every read of a sharded
+# board queries each shard, so requested counts are capped at MAX_SHARD_COUNT.
+DEFAULT_SHARD_COUNT = int(os.getenv('DEFAULT_SHARD_COUNT', '1'))
+MAX_SHARD_COUNT = int(os.getenv('MAX_SHARD_COUNT', '16'))
+
+
+def now():
+    return datetime.utcnow().isoformat()
+
+
+def archived_item(ticket, column):
+    """Archive table item for a ticket leaving column"""
+    item = dict(ticket)
+    # board_id keys the archive index, and DynamoDB rejects empty index keys,
+    # so a ticket whose column is gone is archived without one (sparse index)
+    if column:
+        item['board_id'] = column['board_id']
+    item['column_name'] = column['name'] if column else ''
+    item['archived_at'] = now()
+    item['expires_at'] = int(time.time()) + ARCHIVE_TTL_DAYS * 24 * 60 * 60
+    return item
+
+
+def board_shard_count(shard_count=None):
+    """Shard count for a new board, DEFAULT_SHARD_COUNT when not given, capped at MAX_SHARD_COUNT"""
+    if shard_count is None:
+        shard_count = DEFAULT_SHARD_COUNT
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+    return min(shard_count, MAX_SHARD_COUNT)
+
+
+def projected(attributes, *required):
+    """attributes plus the keys the storage layer itself relies on, or None for whole items"""
+    if not attributes:
+        return None
+    return sorted(set(attributes) | set(required))
+
+
+def project(item, attributes):
+    if not attributes:
+        return item
+    return {key: item[key] for key in attributes if key in item}
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+
+class Storage(ABC):
+    """Board/column/ticket operations shared by all storage engines"""
+
+    @abstractmethod
+    def init(self):
+        """Create tables/indexes if the engine needs them"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_tables(self):
+        raise NotImplementedError
+
+    def flush(self):
+        """Write out anything the engine buffers"""
+        pass
+
+    def seed(self):
+        """Seed the default board unless data already exists"""
+        if self.get_boards():
+            print("Data already seeded")
+            return
+
+        board_id = SEED_BOARD['id']
+        self.create_board(SEED_BOARD['name'], board_id)
+        for col in SEED_COLUMNS:
+            self.create_column(board_id, col['name'], col['position'], id=col['id'])
+        for ticket in SEED_TICKETS:
+            self.create_ticket(
+                ticket['column_id'], ticket['title'], ticket['description'], ticket['position'], id=ticket['id']
+            )
+        print("Seeded initial data successfully")
+
+    # BOARDS
+    @abstractmethod
+    def get_boards(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_board(self, board_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_board(self, name, id=None, shard_count=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_board(self, board_id, name):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_board(self, board_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_board_summaries(self):
+        """id, name, ticket_count and last_modified of every board, without reading tickets"""
+        raise NotImplementedError
+
+    # COLUMNS
+    @abstractmethod
+    def get_column(self, column_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_columns_by_board(self, board_id, attributes=None):
+        """Columns sorted by position; attributes limits the item keys read"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_column(self, board_id, name, position, id=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_column(self, column_id, name=None, position=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_column(self, column_id):
+        raise NotImplementedError
+
+    # TICKETS
+    @abstractmethod
+    def get_ticket(self, ticket_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_tickets_by_column(self, column_id, attributes=None):
+        """Tickets sorted by position; attributes limits the item keys read"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_ticket(self, column_id, title, description, position, id=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_ticket(self, ticket_id, title=None, description=None, column_id=None, position=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_ticket(self, ticket_id):
+        raise NotImplementedError
+
+    def get_all_tickets_by_board(self, board_id, attributes=None):
+        """Get all tickets for a board by first getting all columns, then all tickets"""
+        all_tickets = []
+        for column in self.get_columns_by_board(board_id, ['id']):
+            all_tickets.extend(self.get_tickets_by_column(column['id'], attributes))
+        return all_tickets
+
+    # ARCHIVE
+    @abstractmethod
+    def archive_ticket(self, ticket_id):
+        """Move a ticket into the archive, returning the archived item or None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_archived_tickets(self, board_id, limit=50, cursor=None):
+        """A page of a board's archived tickets, newest first, and the cursor for the next page"""
+        raise NotImplementedError
+
+    def auto_archive(self, board_id, older_than_days=None):
+        """Archive tickets in the board's done columns untouched for older_than_days"""
+        if older_than_days is None:
+            older_than_days = ARCHIVE_AFTER_DAYS
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+        archived = 0
+        for column in self.get_columns_by_board(board_id, ['name']):
+            if column['name'] not in ARCHIVE_COLUMN_NAMES:
+                continue
+            # only the timestamps are needed, not the ticket bodies
+            for ticket in self.get_tickets_by_column(column['id'], ['created_at', 'updated_at']):
+                if (ticket.get('updated_at') or ticket['created_at']) <= cutoff:
+                    if self.archive_ticket(ticket['id']):
+                        archived += 1
+        return archived
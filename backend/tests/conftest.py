@@ -0,0 +1,15 @@
+import os
+import pytest
+from database import create_storage, set_storage
+
+# Run the suite against the in-memory engine unless told otherwise,
+# e.g. TEST_STORAGE_BACKEND=dynamodb with DynamoDB Local running
+TEST_STORAGE_BACKEND = os.getenv('TEST_STORAGE_BACKEND', 'memory')
+
+@pytest.fixture(scope="session", autouse=True)
+def storage():
+    storage = create_storage(TEST_STORAGE_BACKEND)
+    storage.init()
+    storage.seed()
+    set_storage(storage)
+    yield storage
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from httpx import AsyncClient
+from app import create_app, schema
+from loaders import RequestLoaders
+from memory_storage import InMemoryStorage
+
+@pytest.fixture
+def batch_app():
+    storage = InMemoryStorage()
+    storage.seed()
+    return create_app(storage=storage)
+
+def test_request_loaders():
+    """Test loaders reuse reads until cleared"""
+    loaders = RequestLoaders()
+    read = MagicMock(return_value=['col-1'])
+
+    assert loaders.load(read, 'board-1', attributes=['id']) == ['col-1']
+    assert loaders.load(read, 'board-1', attributes=['id']) == ['col-1']
+    loaders.load(read, 'board-2')
+    assert read.call_count == 2
+
+    loaders.clear()
+    loaders.load(read, 'board-1', attributes=['id'])
+    assert read.call_count == 3
+
+@pytest.mark.asyncio
+async def test_batched_operations(batch_app):
+    """Test a batch returns one result per operation, in order"""
+    batch = [
+        {"query": '{ board(id: "default-board") { name } }'},
+        {"query": 'query Columns($boardId: String!) { columns(boardId: $boardId) { id } }', "variables": {"boardId": "default-board"}},
+        {"query": '{ nope }'}
+    ]
+    async with AsyncClient(app=batch_app, base_url="http://test") as client:
+        response = await client.post("/graphql", json=batch)
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["data"]["board"]["name"] == "Opus1 Task Board"
+    assert [c["id"] for c in results[1]["data"]["columns"]] == ["col-1", "col-2", "col-3"]
+    assert "errors" in results[2]
+
+@pytest.mark.asyncio
+async def test_dependent_operations_run_in_order(batch_app):
+    """Test an operation marked dependent sees the earlier mutation"""
+    batch = [
+        {"query": '{ tickets(columnId: "col-2") { id } }'},
+        {"query": 'mutation { updateTicket(input: {id: "ticket-1", columnId: "col-2", position: 1}) { id } }'},
+        {"query": '{ tickets(columnId: "col-2") { id } }', "dependsOn": [0, 1]}
+    ]
+    async with AsyncClient(app=batch_app, base_url="http://test") as client:
+        response = await client.post("/graphql", json=batch)
+    results = response.json()
+    assert [t["id"] for t in results[2]["data"]["tickets"]] == ["ticket-3", "ticket-1"]
+
+@pytest.mark.asyncio
+async def test_invalid_batches(batch_app):
+    """Test malformed batches are rejected"""
+    async with AsyncClient(app=batch_app, base_url="http://test") as client:
+        response = await client.post("/graphql", json=[{"query": "{ boards { id } }", "dependsOn": [0]}])
+        assert response.status_code == 400
+        response = await client.post("/graphql", json=[])
+        assert response.status_code == 400
+        response = await client.post("/graphql", json=[{"query": "{ boards { id } }"}] * 21)
+        assert response.status_code == 400
+        response = await client.post("/graphql", json=[{"query": "{ boards { id } }", "variables": [1]}])
+        assert response.status_code == 400
+        response = await client.post("/graphql", json=[{"query": "{ boards { id } }", "operationName": 1}])
+        assert response.status_code == 400
+
+        # single operations still go through the router
+        response = await client.post("/graphql", json={"query": "{ boards { id } }"})
+        assert response.json()["data"]["boards"] == [{"id": "default-board"}]
+
+@pytest.mark.asyncio
+async def test_failing_operation_keeps_other_results(batch_app):
+    """Test an operation that raises becomes an error entry for its own index"""
+    batch = [{"query": "{ boards { id } }"}, {"query": "{ boards { name } }"}]
+    original = schema.execute_sync
+
+    def flaky(query, **kwargs):
+        if "name" in query:
+            raise RuntimeError("boom")
+        return original(query, **kwargs)
+
+    with patch.object(schema, 'execute_sync', side_effect=flaky):
+        async with AsyncClient(app=batch_app, base_url="http://test") as client:
+            response = await client.post("/graphql", json=batch)
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["data"]["boards"] == [{"id": "default-board"}]
+    assert results[1] == {"data": None, "errors": [{"message": "boom"}]}
@@ -0,0 +1,121 @@
+import threading
+import time
+from unittest.mock import patch
+from coalescing import CoalescingStorage
+from memory_storage import InMemoryStorage
+from database import create_storage
+
+def make_storage(window=60):
+    inner = InMemoryStorage()
+    inner.seed()
+    return inner, CoalescingStorage(inner, window)
+
+def test_updates_are_merged_into_one_write():
+    """Test rapid updates to one ticket flush as a single write"""
+    inner, storage = make_storage()
+    with patch.object(inner, 'update_ticket', wraps=inner.update_ticket) as update_ticket:
+        storage.update_ticket('ticket-1', title='First')
+        storage.update_ticket('ticket-1', position=4)
+        result = storage.update_ticket('ticket-1', title='Second')
+
+        assert result['title'] == 'Second'
+        assert result['position'] == 4
+        assert result['description'] == 'Use bolt.new to provide quick greenfield project'
+        update_ticket.assert_not_called()
+
+        storage.flush()
+        update_ticket.assert_called_once_with('ticket-1', title='Second', position=4)
+    assert inner.get_ticket('ticket-1')['title'] == 'Second'
+
+def test_read_your_writes():
+    """Test reads see pending updates, including column moves"""
+    inner, storage = make_storage()
+    storage.update_ticket('ticket-1', title='Moved', column_id='col-2', position=1)
+
+    assert storage.get_ticket('ticket-1')['title'] == 'Moved'
+    assert [t['id'] for t in storage.get_tickets_by_column('col-1')] == ['ticket-2']
+    assert [t['id'] for t in storage.get_tickets_by_column('col-2')] == ['ticket-3', 'ticket-1']
+    assert len(storage.get_all_tickets_by_board('default-board')) == 7
+
+    # the underlying engine hasn't been written yet
+    assert inner.get_ticket('ticket-1')['column_id'] == 'col-1'
+
+def test_delete_drops_pending_update():
+    """Test deleting a ticket discards its pending update"""
+    inner, storage = make_storage()
+    storage.update_ticket('ticket-1', title='Gone')
+    storage.delete_ticket('ticket-1')
+    storage.flush()
+    assert inner.get_ticket('ticket-1') is None
+
+def test_delete_column_flushes_pending_moves():
+    """Test a pending move into a column is deleted with the column"""
+    inner, storage = make_storage()
+    storage.update_ticket('ticket-1', column_id='col-3')
+    storage.delete_column('col-3')
+    assert inner.get_ticket('ticket-1') is None
+
+def test_window_flushes_automatically():
+    """Test pending updates are written once the window elapses"""
+    inner, storage = make_storage(window=0.01)
+    storage.update_ticket('ticket-1', title='Later')
+    time.sleep(0.1)
+    assert inner.get_ticket('ticket-1')['title'] == 'Later'
+    assert storage.pending == {}
+
+def test_create_storage_with_window():
+    """Test the coalescing queue is only added when a window is set"""
+    assert isinstance(create_storage('memory', coalesce_window_ms=50), CoalescingStorage)
+    assert isinstance(create_storage('memory', coalesce_window_ms=0), InMemoryStorage)
+
+def test_failed_flush_is_retried():
+    """Test an update that fails to flush is requeued under newer updates"""
+    inner, storage = make_storage()
+    storage.update_ticket('ticket-1', title='First', position=3)
+    with patch.object(inner, 'update_ticket', side_effect=RuntimeError('throttled')):
+        storage.flush()
+    assert storage.pending['ticket-1']['fields'] == {'title': 'First', 'position': 3}
+    assert storage.get_ticket('ticket-1')['title'] == 'First'
+
+    storage.update_ticket('ticket-1', title='Second')
+    storage.flush()
+    assert storage.pending == {}
+    assert inner.get_ticket('ticket-1')['title'] == 'Second'
+    assert inner.get_ticket('ticket-1')['position'] == 3
+
+def test_reads_do_not_wait_for_a_flush():
+    """Test ticket reads go ahead while a flush is writing, and still see its updates"""
+    inner, storage = make_storage()
+    storage.update_ticket('ticket-1', title='Slow', column_id='col-2', position=1)
+    writing = threading.Event()
+    release = threading.Event()
+    update_ticket = inner.update_ticket
+
+    def slow_update(*args, **kwargs):
+        writing.set()
+        release.wait(5)
+        return update_ticket(*args, **kwargs)
+
+    with patch.object(inner, 'update_ticket', side_effect=slow_update):
+        flusher = threading.Thread(target=storage.flush)
+        flusher.start()
+        assert writing.wait(5)
+        assert storage.get_ticket('ticket-1')['title'] == 'Slow'
+        assert [t['id'] for t in storage.get_tickets_by_column('col-2')] == ['ticket-3', 'ticket-1']
+        release.set()
+        flusher.join(5)
+    assert inner.get_ticket('ticket-1')['title'] == 'Slow'
+
+def test_pending_moves_are_counted():
+    """Test column counts and updated_at reflect a pending move before it is flushed"""
+    inner, storage = make_storage()
+    before = inner.get_ticket('ticket-1').get('updated_at')
+    moved = storage.update_ticket('ticket-1', column_id='col-2', position=1)
+    assert moved['updated_at'] != before
+
+    counts = {c['id']: c['ticket_count'] for c in storage.get_columns_by_board('default-board')}
+    assert counts == {'col-1': 1, 'col-2': 2, 'col-3': 4}
+    assert storage.get_column('col-2')['ticket_count'] == len(storage.get_tickets_by_column('col-2'))
+
+    storage.flush()
+    assert {c['id']: c['ticket_count'] for c in storage.get_columns_by_board('default-board')} == counts
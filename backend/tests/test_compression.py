@@ -0,0 +1,61 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient
+from compression import CompressionMiddleware, negotiate_encoding
+
+LARGE_BODY = "ticket description " * 200
+
+def make_app(minimum_size=500):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size, compression_level=5)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    return app
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation"""
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0") is None
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("br, gzip", available=["gzip"]) == "gzip"
+
+@pytest.mark.asyncio
+async def test_brotli_response():
+    """Test large responses are brotli compressed when accepted"""
+    async with AsyncClient(app=make_app(), base_url="http://test") as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "br"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(LARGE_BODY)
+        assert response.text == LARGE_BODY
+
+@pytest.mark.asyncio
+async def test_gzip_response():
+    """Test large responses are gzip compressed when only gzip is accepted"""
+    async with AsyncClient(app=make_app(), base_url="http://test") as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == LARGE_BODY
+
+@pytest.mark.asyncio
+async def test_small_and_identity_responses():
+    """Test small responses and identity clients are left uncompressed"""
+    async with AsyncClient(app=make_app(), base_url="http://test") as client:
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+        assert "content-encoding" not in response.headers
+        assert response.text == "ok"
+
+        response = await client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.text == LARGE_BODY
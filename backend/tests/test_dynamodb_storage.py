@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import patch
+from moto import mock_aws
+from dynamodb_storage import DynamoDBStorage, shard_key
+
+@pytest.fixture
+def dynamodb_storage(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        # point at the AWS endpoint so moto serves it in-process
+        storage = DynamoDBStorage('https://dynamodb.us-east-1.amazonaws.com')
+        storage.init()
+        yield storage
+
+def test_shard_key():
+    """Test shard keys are stable and unsharded parents keep their plain id"""
+    assert shard_key('col-1', 'ticket-1', 1) == 'col-1'
+    key = shard_key('col-1', 'ticket-1', 4)
+    assert key == shard_key('col-1', 'ticket-1', 4)
+    assert key.startswith('col-1#') and 0 <= int(key.split('#')[1]) < 4
+
+def test_sharded_board_round_trip(dynamodb_storage):
+    """Test sharded columns and tickets are written over several keys and read back in order"""
+    storage = dynamodb_storage
+    board = storage.create_board('Sharded', shard_count=4)
+    columns = [storage.create_column(board['id'], f'Column {i}', i) for i in range(6)]
+    column_id = columns[0]['id']
+    tickets = [storage.create_ticket(column_id, f'Ticket {i}', '', i) for i in range(12)]
+
+    stored = storage.table('tickets').scan()['Items']
+    stored_keys = {t['column_id'] for t in stored if t['column_id'].startswith(column_id)}
+    assert len(stored_keys) > 1
+    assert all(key.startswith(column_id + '#') for key in stored_keys)
+
+    assert [c['id'] for c in storage.get_columns_by_board(board['id'])] == [c['id'] for c in columns]
+    assert all(c['board_id'] == board['id'] for c in storage.get_columns_by_board(board['id']))
+    read = storage.get_tickets_by_column(column_id)
+    assert [t['id'] for t in read] == [t['id'] for t in tickets]
+    assert all(t['column_id'] == column_id for t in read)
+    assert storage.get_ticket(tickets[0]['id'])['column_id'] == column_id
+
+    # moving a ticket rewrites its shard key for the target column
+    moved = storage.update_ticket(tickets[0]['id'], column_id=columns[1]['id'], position=0)
+    assert moved['column_id'] == columns[1]['id']
+    assert [t['id'] for t in storage.get_tickets_by_column(columns[1]['id'])] == [tickets[0]['id']]
+    assert storage.get_column(column_id)['ticket_count'] == 11
+    assert storage.get_board(board['id'])['ticket_count'] == 12
+
+    storage.delete_board(board['id'])
+    assert storage.get_columns_by_board(board['id']) == []
+    assert storage.get_tickets_by_column(column_id) == []
+
+def test_counts_are_backfilled(dynamodb_storage):
+    """Test items from before counters existed get their actual counts instead of going negative"""
+    storage = dynamodb_storage
+    storage.seed()
+    for table, item_id in (('columns', 'col-1'), ('boards', 'default-board')):
+        storage.table(table).update_item(Key={'id': item_id}, UpdateExpression='REMOVE ticket_count')
+
+    storage.delete_ticket('ticket-1')
+    assert storage.get_column('col-1')['ticket_count'] == 1
+    assert storage.get_board('default-board')['ticket_count'] == 6
+
+    # a move within the board only touches the column counters, but stamps the board
+    storage.update_ticket('ticket-2', column_id='col-2')
+    column = storage.get_column('col-2')
+    board = storage.get_board('default-board')
+    assert column['ticket_count'] == 2
+    assert board['ticket_count'] == 6
+    assert board['last_modified'] == column['last_modified']
+    assert board['last_modified'] == storage.get_column('col-1')['last_modified']
+
+def test_archive_orphaned_ticket(dynamodb_storage):
+    """Test a ticket whose column is gone is archived without a board_id index key"""
+    storage = dynamodb_storage
+    storage.seed()
+    storage.table('columns').delete_item(Key={'id': 'col-1'})
+
+    archived = storage.archive_ticket('ticket-1')
+    assert 'board_id' not in archived
+    stored = storage.table('archived_tickets').get_item(Key={'id': 'ticket-1'})['Item']
+    assert 'board_id' not in stored
+    assert storage.get_archived_tickets('default-board')[0] == []
+
+def test_shard_count_cache_is_bounded(dynamodb_storage):
+    """Test only the most recently used shard counts are kept, evicted ones are read again"""
+    storage = dynamodb_storage
+    with patch('dynamodb_storage.SHARD_COUNT_CACHE_SIZE', 2):
+        boards = [storage.create_board(f'Board {i}', shard_count=i + 1) for i in range(3)]
+        assert list(storage.shard_counts) == [('boards', boards[1]['id']), ('boards', boards[2]['id'])]
+
+        assert storage.shard_count('boards', boards[0]['id']) == 1
+        assert storage.shard_count('boards', boards[2]['id']) == 3
+        assert list(storage.shard_counts) == [('boards', boards[0]['id']), ('boards', boards[2]['id'])]
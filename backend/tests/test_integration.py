@@ -1,7 +1,9 @@
 import pytest
 import asyncio
+from unittest.mock import patch
 from httpx import AsyncClient
 from app import app
+import database as db
 
 @pytest.mark.asyncio
 async def test_graphql_endpoint():
@@ -47,6 +49,32 @@ async def test_boards_query():
         assert "boards" in data["data"]
         assert isinstance(data["data"]["boards"], list)
 
+@pytest.mark.asyncio
+async def test_board_summaries_query():
+    """Test boardSummaries and ticketCount fields"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        query = """
+        query {
+            boardSummaries {
+                id
+                name
+                ticketCount
+                lastModified
+            }
+            columns(boardId: "default-board") {
+                id
+                ticketCount
+            }
+        }
+        """
+        
+        response = await client.post("/graphql", json={"query": query})
+        assert response.status_code == 200
+        
+        data = response.json()["data"]
+        summary = next(b for b in data["boardSummaries"] if b["id"] == "default-board")
+        assert summary["ticketCount"] == sum(c["ticketCount"] for c in data["columns"])
+
 @pytest.mark.asyncio
 async def test_board_with_columns_and_tickets():
     """Test complete board data query"""
@@ -159,4 +187,91 @@ async def test_create_and_update_ticket():
         assert response.status_code == 200
         
         updated_ticket = response.json()["data"]["updateTicket"]
-        assert updated_ticket["title"] == "Updated Test Ticket"
\ No newline at end of file
+        assert updated_ticket["title"] == "Updated Test Ticket"
+
+@pytest.mark.asyncio
+async def test_archive_ticket_and_archived_tickets_query():
+    """Test archiveTicket mutation and archivedTickets pagination"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        create_mutation = """
+        mutation {
+            createTicket(input: {columnId: "col-3", title: "Old ticket", description: "Done long ago", position: 99}) {
+                id
+            }
+        }
+        """
+        response = await client.post("/graphql", json={"query": create_mutation})
+        ticket_id = response.json()["data"]["createTicket"]["id"]
+        
+        archive_mutation = """
+        mutation ArchiveTicket($id: String!) {
+            archiveTicket(id: $id) {
+                id
+                boardId
+                columnName
+            }
+        }
+        """
+        response = await client.post("/graphql", json={"query": archive_mutation, "variables": {"id": ticket_id}})
+        archived = response.json()["data"]["archiveTicket"]
+        assert archived["boardId"] == "default-board"
+        
+        archived_query = """
+        query {
+            archivedTickets(boardId: "default-board", limit: 10) {
+                items {
+                    id
+                    archivedAt
+                }
+                nextCursor
+            }
+        }
+        """
+        response = await client.post("/graphql", json={"query": archived_query})
+        assert response.status_code == 200
+        items = response.json()["data"]["archivedTickets"]["items"]
+        assert ticket_id in [item["id"] for item in items]
+
+@pytest.mark.asyncio
+async def test_archived_tickets_limit():
+    """Test archivedTickets rejects limits below 1 and caps large ones"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        query = """
+        query($limit: Int!) {
+            archivedTickets(boardId: "default-board", limit: $limit) {
+                items { id }
+            }
+        }
+        """
+        response = await client.post("/graphql", json={"query": query, "variables": {"limit": 0}})
+        assert response.status_code == 200
+        assert response.json()["errors"][0]["message"] == "limit must be at least 1"
+
+        with patch.object(db, 'get_archived_tickets', return_value=([], None)) as get_archived_tickets:
+            response = await client.post("/graphql", json={"query": query, "variables": {"limit": 5000}})
+        assert "errors" not in response.json()
+        get_archived_tickets.assert_called_once_with("default-board", 100, None)
+
+@pytest.mark.asyncio
+async def test_selection_set_projection():
+    """Test only the selected ticket attributes are read"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        query = """
+        query {
+            allTickets(boardId: "default-board") {
+                id
+                ...TicketTitle
+                ... on Ticket { position }
+            }
+        }
+        fragment TicketTitle on Ticket { title }
+        """
+        
+        with patch('resolvers.db.get_all_tickets_by_board', wraps=db.get_all_tickets_by_board) as get_tickets:
+            response = await client.post("/graphql", json={"query": query})
+        assert response.status_code == 200
+        get_tickets.assert_called_once_with("default-board", attributes=["id", "position", "title"])
+        
+        tickets = response.json()["data"]["allTickets"]
+        assert tickets
+        assert set(tickets[0]) == {"id", "title", "position"}
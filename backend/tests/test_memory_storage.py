@@ -0,0 +1,241 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient
+from memory_storage import InMemoryStorage
+from storage import Storage
+from app import create_app, auto_archive_loop
+import database as db
+
+@pytest.fixture
+def memory_storage():
+    storage = InMemoryStorage()
+    storage.seed()
+    return storage
+
+def test_seed(memory_storage):
+    """Test seeding the default board"""
+    assert memory_storage.get_board('default-board')['name'] == 'Opus1 Task Board'
+    columns = memory_storage.get_columns_by_board('default-board')
+    assert [c['id'] for c in columns] == ['col-1', 'col-2', 'col-3']
+    assert len(memory_storage.get_all_tickets_by_board('default-board')) == 7
+
+    # seeding twice is a no-op
+    memory_storage.seed()
+    assert len(memory_storage.get_boards()) == 1
+
+def test_ticket_move_updates_column_index(memory_storage):
+    """Test moving a ticket keeps the column index in sync"""
+    updated = memory_storage.update_ticket('ticket-1', column_id='col-2', position=5)
+    assert updated['column_id'] == 'col-2'
+    assert updated['title'] == 'Prompt LLM to init'
+
+    assert [t['id'] for t in memory_storage.get_tickets_by_column('col-1')] == ['ticket-2']
+    assert [t['id'] for t in memory_storage.get_tickets_by_column('col-2')] == ['ticket-3', 'ticket-1']
+
+def test_items_are_copies(memory_storage):
+    """Test callers can't mutate stored items"""
+    board = memory_storage.get_board('default-board')
+    board['name'] = 'Mutated'
+    assert memory_storage.get_board('default-board')['name'] == 'Opus1 Task Board'
+
+def test_delete_cascades(memory_storage):
+    """Test deleting a board removes its columns and tickets"""
+    memory_storage.delete_board('default-board')
+    assert memory_storage.get_board('default-board') is None
+    assert memory_storage.get_columns_by_board('default-board') == []
+    assert memory_storage.get_tickets_by_column('col-3') == []
+    assert memory_storage.tickets == {}
+
+def test_use_storage_routes_database_functions(memory_storage):
+    """Test the database functions follow the current storage"""
+    with db.use_storage(memory_storage):
+        db.create_board('Scoped board', 'scoped-board')
+        assert db.get_board('scoped-board') is not None
+    assert memory_storage.get_board('scoped-board') is not None
+    assert db.get_storage() is not memory_storage
+
+@pytest.mark.asyncio
+async def test_app_with_pinned_storage(memory_storage):
+    """Test an app instance serves requests from its own storage"""
+    memory_storage.update_board('default-board', 'Pinned Board')
+    app = create_app(storage=memory_storage)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", json={"query": '{ board(id: "default-board") { name } }'})
+        assert response.json()["data"]["board"]["name"] == "Pinned Board"
+
+def test_ticket_counts(memory_storage):
+    """Test column and board counters follow creates, moves and deletes"""
+    def counts():
+        columns = {c['id']: c['ticket_count'] for c in memory_storage.get_columns_by_board('default-board')}
+        return columns, memory_storage.get_board('default-board')['ticket_count']
+
+    assert counts() == ({'col-1': 2, 'col-2': 1, 'col-3': 4}, 7)
+
+    ticket = memory_storage.create_ticket('col-2', 'New', 'Desc', 1)
+    memory_storage.update_ticket('ticket-1', column_id='col-3')
+    memory_storage.update_ticket('ticket-2', title='Renamed')
+    memory_storage.delete_ticket(ticket['id'])
+    assert counts() == ({'col-1': 1, 'col-2': 1, 'col-3': 5}, 7)
+
+    memory_storage.delete_column('col-3')
+    assert counts() == ({'col-1': 1, 'col-2': 1}, 2)
+
+    # moves within the board stamp it without changing its count
+    memory_storage.update_ticket('ticket-2', column_id='col-2')
+    assert counts() == ({'col-1': 0, 'col-2': 2}, 2)
+    board = memory_storage.get_board('default-board')
+    assert board['last_modified'] == memory_storage.get_column('col-2')['last_modified']
+
+    summary = memory_storage.get_board_summaries()[0]
+    assert summary['ticket_count'] == 2
+    assert summary['last_modified'] is not None
+    assert 'created_at' not in summary
+
+def test_counts_are_backfilled(memory_storage):
+    """Test items from before counters existed get their actual counts instead of going negative"""
+    for item in (memory_storage.columns['col-1'], memory_storage.boards['default-board']):
+        del item['ticket_count']
+
+    memory_storage.delete_ticket('ticket-1')
+    assert memory_storage.get_column('col-1')['ticket_count'] == 1
+    assert memory_storage.get_board('default-board')['ticket_count'] == 6
+
+def test_archive_ticket(memory_storage):
+    """Test archiving moves a ticket out of the live tables"""
+    archived = memory_storage.archive_ticket('ticket-4')
+    assert archived['board_id'] == 'default-board'
+    assert archived['column_name'] == 'Done'
+    assert archived['expires_at'] > 0
+
+    assert memory_storage.get_ticket('ticket-4') is None
+    assert [t['id'] for t in memory_storage.get_tickets_by_column('col-3')] == ['ticket-5', 'ticket-6', 'ticket-7']
+    assert memory_storage.get_board('default-board')['ticket_count'] == 6
+    assert memory_storage.archive_ticket('ticket-4') is None
+
+def test_auto_archive_and_pagination(memory_storage):
+    """Test auto-archive only takes old tickets from done columns, newest first in pages"""
+    memory_storage.update_ticket('ticket-7', title='Recently touched')
+    assert memory_storage.auto_archive('default-board', older_than_days=1) == 0
+    assert memory_storage.auto_archive('default-board', older_than_days=0) == 4
+
+    assert len(memory_storage.get_tickets_by_column('col-1')) == 2
+    assert memory_storage.get_tickets_by_column('col-3') == []
+
+    first_page, cursor = memory_storage.get_archived_tickets('default-board', limit=3)
+    second_page, last_cursor = memory_storage.get_archived_tickets('default-board', limit=3, cursor=cursor)
+    assert len(first_page) == 3
+    assert len(second_page) == 1
+    assert last_cursor is None
+    ids = [t['id'] for t in first_page + second_page]
+    assert sorted(ids) == ['ticket-4', 'ticket-5', 'ticket-6', 'ticket-7']
+    archived_at = [t['archived_at'] for t in first_page + second_page]
+    assert archived_at == sorted(archived_at, reverse=True)
+
+def test_archive_orphaned_ticket(memory_storage):
+    """Test a ticket whose column is gone is archived without a board_id"""
+    memory_storage.columns.pop('col-1')
+    archived = memory_storage.archive_ticket('ticket-1')
+    assert 'board_id' not in archived
+    assert archived['column_name'] == ''
+    assert memory_storage.get_ticket('ticket-1') is None
+
+def test_auto_archive_reads_only_timestamps(memory_storage):
+    """Test auto-archive projects ticket reads down to the timestamps it compares"""
+    with patch.object(memory_storage, 'get_tickets_by_column', wraps=memory_storage.get_tickets_by_column) as get_tickets:
+        memory_storage.auto_archive('default-board', older_than_days=0)
+    get_tickets.assert_called_once_with('col-3', ['created_at', 'updated_at'])
+
+def test_run_auto_archive(memory_storage):
+    """Test the policy is applied to every board"""
+    other = memory_storage.create_board('Other')
+    done = memory_storage.create_column(other['id'], 'Done', 0)
+    memory_storage.create_ticket(done['id'], 'Shipped', 'Long ago', 0)
+
+    with db.use_storage(memory_storage), patch('storage.ARCHIVE_AFTER_DAYS', 0):
+        assert db.run_auto_archive() == 5
+    assert memory_storage.get_tickets_by_column(done['id']) == []
+
+@pytest.mark.asyncio
+async def test_auto_archive_loop(memory_storage):
+    """Test the background loop keeps archiving, and survives a failed pass"""
+    calls = []
+
+    def run():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('throttled')
+        return db.run_auto_archive()
+
+    with patch('app.run_auto_archive', side_effect=run), patch('storage.ARCHIVE_AFTER_DAYS', 0):
+        task = asyncio.create_task(auto_archive_loop(memory_storage, 0.01))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if memory_storage.get_tickets_by_column('col-3') == []:
+                break
+        task.cancel()
+    assert len(calls) >= 2
+    assert memory_storage.get_tickets_by_column('col-3') == []
+
+@pytest.mark.asyncio
+async def test_auto_archive_mutation(memory_storage):
+    """Test the autoArchive mutation archives a board's old done tickets"""
+    app = create_app(storage=memory_storage)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", json={
+            "query": 'mutation { autoArchive(boardId: "default-board", olderThanDays: 0) }'
+        })
+    assert response.json()["data"]["autoArchive"] == 4
+    assert memory_storage.get_tickets_by_column('col-3') == []
+
+def test_projected_reads(memory_storage):
+    """Test attributes limits the keys read, keeping the ones storage needs"""
+    tickets = memory_storage.get_tickets_by_column('col-1', ['title'])
+    assert tickets == [
+        {'id': 'ticket-1', 'column_id': 'col-1', 'position': 0, 'title': 'Prompt LLM to init'},
+        {'id': 'ticket-2', 'column_id': 'col-1', 'position': 1, 'title': 'Make adjustments'}
+    ]
+    columns = memory_storage.get_columns_by_board('default-board', ['name'])
+    assert set(columns[0]) == {'id', 'name', 'position'}
+    assert 'description' not in memory_storage.get_all_tickets_by_board('default-board', ['title'])[0]
+
+@pytest.mark.asyncio
+async def test_column_stored_without_counters(memory_storage):
+    """Test columns from before counters and sharding existed resolve with the defaults"""
+    for key in ('ticket_count', 'last_modified', 'shard_count'):
+        del memory_storage.columns['col-1'][key]
+
+    app = create_app(storage=memory_storage)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", json={
+            "query": '{ columns(boardId: "default-board") { id ticketCount shardCount lastModified } }'
+        })
+    body = response.json()
+    assert "errors" not in body
+    assert body["data"]["columns"][0] == {"id": "col-1", "ticketCount": 0, "shardCount": 1, "lastModified": None}
+
+def test_shard_count_is_kept(memory_storage):
+    """Test boards and their columns report the shard count they were created with"""
+    board = memory_storage.create_board('Sharded', shard_count=4)
+    column = memory_storage.create_column(board['id'], 'To Do', 0)
+    assert board['shard_count'] == 4
+    assert column['shard_count'] == 4
+    assert memory_storage.get_board('default-board')['shard_count'] == 1
+
+def test_shard_count_is_bounded(memory_storage):
+    """Test requested shard counts are capped and must be at least 1"""
+    with patch('storage.MAX_SHARD_COUNT', 8):
+        assert memory_storage.create_board('Huge', shard_count=10000)['shard_count'] == 8
+    with pytest.raises(ValueError):
+        memory_storage.create_board('Negative', shard_count=-1)
+    with patch('storage.DEFAULT_SHARD_COUNT', 4):
+        assert memory_storage.create_board('Default')['shard_count'] == 4
+
+def test_storage_engines_must_implement_the_interface():
+    """Test an engine missing a storage primitive fails when it is constructed"""
+    class Incomplete(Storage):
+        def get_boards(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,106 @@
+import asyncio
+import boto3
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from botocore.stub import Stubber
+from fastapi import FastAPI
+from httpx import AsyncClient
+from profiling import ProfilingMiddleware, instrument_boto3, profiled, _boto3_timings
+
+def make_app(client=None, **options):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, **options)
+
+    @app.post("/graphql")
+    def graphql():
+        if client is not None:
+            client.list_tables()
+        return {"data": {"ok": True}}
+
+    return app
+
+def stubbed_client(calls):
+    client = boto3.client(
+        'dynamodb', region_name='us-east-1', aws_access_key_id='dummy', aws_secret_access_key='dummy'
+    )
+    instrument_boto3(client)
+    stubber = Stubber(client)
+    for _ in range(calls):
+        stubber.add_response('list_tables', {'TableNames': []})
+    stubber.activate()
+    return client
+
+def test_instrument_boto3_only_times_profiled_requests():
+    """Test boto3 calls are timed only while a collector is set"""
+    client = stubbed_client(calls=2)
+    client.list_tables()
+
+    timings = {'operations': {}}
+    token = _boto3_timings.set(timings)
+    try:
+        client.list_tables()
+    finally:
+        _boto3_timings.reset(token)
+
+    assert timings['operations']['ListTables']['calls'] == 1
+
+@pytest.mark.asyncio
+async def test_profile_in_extensions():
+    """Test the X-Profile header returns a profile in the response extensions"""
+    app = make_app(client=stubbed_client(calls=2), token='secret', sample_rate=0, directory='')
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", headers={"X-Profile": "secret"})
+        assert response.status_code == 200
+        payload = response.json()
+        assert payload["data"] == {"ok": True}
+        profile = payload["extensions"]["profile"]
+        assert profile["boto3"]["ListTables"]["calls"] == 1
+        assert "cumulative" in profile["stats"]
+
+        response = await client.post("/graphql", headers={"X-Profile": "wrong"})
+        assert "extensions" not in response.json()
+
+@pytest.mark.asyncio
+async def test_sampled_profiles_written_to_directory(tmp_path):
+    """Test sampled requests are dumped to the profile directory only"""
+    app = make_app(sample_rate=1, directory=str(tmp_path))
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql")
+        assert "extensions" not in response.json()
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+def test_concurrent_boto3_calls_are_each_timed():
+    """Test parallel calls (e.g. shard queries) don't overwrite each other's start time"""
+    client = stubbed_client(calls=8)
+    timings = {'operations': {}}
+    token = _boto3_timings.set(timings)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(copy_context().run, client.list_tables) for _ in range(8)]
+            for future in futures:
+                future.result()
+    finally:
+        _boto3_timings.reset(token)
+
+    assert timings['operations']['ListTables']['calls'] == 8
+
+def worker_task():
+    return sum(range(1000))
+
+@pytest.mark.asyncio
+async def test_worker_threads_are_profiled():
+    """Test profiled() calls on worker threads show up in the request's profile"""
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, token='secret', sample_rate=0, directory='', top_n=500)
+
+    @app.post("/graphql")
+    async def graphql():
+        await asyncio.to_thread(profiled(worker_task))
+        return {"data": {"ok": True}}
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", headers={"X-Profile": "secret"})
+    profile = response.json()["extensions"]["profile"]
+    assert profile["threads"] == 2
+    assert "worker_task" in profile["stats"]
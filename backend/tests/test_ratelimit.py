@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from ratelimit import TokenBucket, RateLimiter, RateLimitMiddleware
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket():
+    """Test token bucket burst and refill"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+    assert [bucket.take() for _ in range(3)] == [0, 0, 0]
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.now = 0.5
+    assert bucket.take() == 0
+    assert bucket.take() > 0
+
+def test_rate_limiter_keys_and_eviction():
+    """Test buckets are per key and bounded"""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, max_buckets=2, clock=clock)
+
+    assert limiter.take('a:board-1') == 0
+    assert limiter.take('a:board-1') > 0
+    assert limiter.take('a:board-2') == 0
+    assert limiter.take('b:board-1') == 0
+    assert len(limiter.buckets) == 2
+    assert 'a:board-1' not in limiter.buckets
+
+def make_app(limiter, max_concurrent=10, release=None):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, max_concurrent=max_concurrent)
+
+    @app.post("/graphql")
+    async def graphql(payload: dict):
+        if release is not None:
+            await release.wait()
+        return {"data": payload.get("variables")}
+
+    return app
+
+@pytest.mark.asyncio
+async def test_rate_limited_response():
+    """Test requests over the limit get a fast 429 with a retry hint"""
+    limiter = RateLimiter(rate=0.5, burst=2, clock=FakeClock())
+    payload = {"query": "{ boards { id } }", "variables": {"boardId": "board-1"}}
+    async with AsyncClient(app=make_app(limiter), base_url="http://test") as client:
+        for _ in range(2):
+            response = await client.post("/graphql", json=payload)
+            assert response.status_code == 200
+            assert response.json() == {"data": {"boardId": "board-1"}}
+
+        response = await client.post("/graphql", json=payload)
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+        assert response.json()["errors"][0]["extensions"]["code"] == "RATE_LIMITED"
+
+        # other boards and other clients have their own buckets
+        payload["variables"]["boardId"] = "board-2"
+        assert (await client.post("/graphql", json=payload)).status_code == 200
+        response = await client.post("/graphql", json=payload, headers={"X-Client-Id": "tab-2"})
+        assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_concurrency_gate():
+    """Test requests over the concurrency bound are rejected, not queued"""
+    release = asyncio.Event()
+    app = make_app(RateLimiter(rate=100, burst=100), max_concurrent=1, release=release)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/graphql", json={"query": "{ a }"}))
+        await asyncio.sleep(0.05)
+
+        response = await client.post("/graphql", json={"query": "{ b }"})
+        assert response.status_code == 429
+        assert response.json()["errors"][0]["message"] == "Server busy"
+
+        release.set()
+        assert (await first).status_code == 200
+
+@pytest.mark.asyncio
+async def test_batches_cost_one_token_per_operation():
+    """Test each operation in a batch is charged to its own board's bucket"""
+    limiter = RateLimiter(rate=0.5, burst=4, clock=FakeClock())
+    operation = {"query": "{ boards { id } }", "variables": {"boardId": "board-1"}}
+    async with AsyncClient(app=make_app(limiter), base_url="http://test") as client:
+        # the stub endpoint only takes single operations, so admitted batches get a 422
+        response = await client.post("/graphql", json=[operation] * 3)
+        assert response.status_code != 429
+        response = await client.post("/graphql", json=[operation] * 2)
+        assert response.status_code == 429
+        # rejected batches aren't charged, and other boards have their own buckets
+        other = {"query": "{ boards { id } }", "variables": {"boardId": "board-2"}}
+        response = await client.post("/graphql", json=[operation, other, other])
+        assert response.status_code != 429
+    assert limiter.buckets["127.0.0.1:board-1"].tokens == 0
+    assert limiter.buckets["127.0.0.1:board-2"].tokens == 2
+
+@pytest.mark.asyncio
+async def test_batches_count_against_the_concurrency_gate():
+    """Test a batch takes one concurrency slot per operation"""
+    release = asyncio.Event()
+    app = make_app(RateLimiter(rate=100, burst=100), max_concurrent=3, release=release)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/graphql", json={"query": "{ a }"}))
+        await asyncio.sleep(0.05)
+
+        response = await client.post("/graphql", json=[{"query": "{ b }"}] * 3)
+        assert response.status_code == 429
+        assert response.json()["errors"][0]["message"] == "Server busy"
+
+        release.set()
+        assert (await first).status_code == 200
+
+@pytest.mark.asyncio
+async def test_batch_larger_than_burst_is_rejected():
+    """Test a batch no bucket could ever admit gets a 400 rather than an endless 429"""
+    limiter = RateLimiter(rate=1, burst=2, clock=FakeClock())
+    operation = {"query": "{ boards { id } }", "variables": {"boardId": "board-1"}}
+    async with AsyncClient(app=make_app(limiter), base_url="http://test") as client:
+        response = await client.post("/graphql", json=[operation] * 3)
+    assert response.status_code == 400
+    assert "burst" in response.json()["errors"][0]["message"]
+    assert limiter.buckets == {}
@@ -48,6 +48,21 @@ class TestQuery:
         assert result is None
         mock_get_board.assert_called_once_with('nonexistent')
     
+    @patch('resolvers.db.get_board_summaries')
+    def test_board_summaries_resolver(self, mock_get_summaries):
+        """Test board summaries query resolver"""
+        mock_get_summaries.return_value = [
+            {'id': 'board-1', 'name': 'Test Board', 'ticket_count': 3, 'last_modified': '2023-01-02T00:00:00'},
+            {'id': 'board-2', 'name': 'Empty Board'}
+        ]
+        
+        result = self.query.board_summaries()
+        
+        assert result[0].ticket_count == 3
+        assert result[0].last_modified == '2023-01-02T00:00:00'
+        assert result[1].ticket_count == 0
+        mock_get_summaries.assert_called_once()
+    
     @patch('resolvers.db.get_columns_by_board')
     def test_columns_resolver(self, mock_get_columns):
         """Test columns query resolver"""
@@ -128,6 +143,28 @@ class TestMutation:
         assert result.name == 'New Column'
         mock_create_column.assert_called_once_with('board-1', 'New Column', 1)
     
+    @patch('resolvers.db.archive_ticket')
+    def test_archive_ticket_mutation(self, mock_archive_ticket):
+        """Test archive ticket mutation"""
+        mock_archive_ticket.return_value = {
+            'id': 'ticket-1',
+            'board_id': 'board-1',
+            'column_id': 'col-3',
+            'column_name': 'Done',
+            'title': 'Test Ticket',
+            'description': 'Test Description',
+            'position': 0,
+            'created_at': '2023-01-01T00:00:00',
+            'archived_at': '2023-02-01T00:00:00',
+            'expires_at': 1706745600
+        }
+        
+        result = self.mutation.archive_ticket('ticket-1')
+        
+        assert result.id == 'ticket-1'
+        assert result.column_name == 'Done'
+        mock_archive_ticket.assert_called_once_with('ticket-1')
+    
     @patch('resolvers.db.delete_ticket')
     def test_delete_ticket_mutation(self, mock_delete_ticket):
         """Test delete ticket mutation"""
@@ -0,0 +1,183 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from starlette.testclient import TestClient
+from memory_storage import InMemoryStorage
+from warming import WorkingSetStorage, WarmUp, warm_up
+from app import create_app
+from database import create_storage
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_storage(ttl=60):
+    inner = InMemoryStorage()
+    inner.seed()
+    clock = Clock()
+    return inner, WorkingSetStorage(inner, ttl, clock), clock
+
+def test_warm_board_is_served_from_memory():
+    """Test reads of a warmed board don't reach the underlying storage"""
+    inner, storage, clock = make_storage()
+    storage.warm('default-board')
+
+    with patch.object(inner, 'get_columns_by_board') as get_columns, \
+            patch.object(inner, 'get_tickets_by_column') as get_tickets:
+        columns = storage.get_columns_by_board('default-board', ['name'])
+        tickets = storage.get_all_tickets_by_board('default-board', ['title'])
+        get_columns.assert_not_called()
+        get_tickets.assert_not_called()
+
+    assert [c['name'] for c in columns] == ['To Do', 'In Progress', 'Done']
+    assert set(columns[0]) == {'id', 'name', 'position'}
+    assert len(tickets) == 7
+    assert 'description' not in tickets[0]
+    assert storage.get_board('default-board')['name'] == 'Opus1 Task Board'
+
+def test_writes_are_read_back():
+    """Test the working set reads its own writes, including moves between columns"""
+    inner, storage, clock = make_storage()
+    storage.warm('default-board')
+
+    storage.update_ticket('ticket-1', column_id='col-2', position=1)
+    assert [t['id'] for t in storage.get_tickets_by_column('col-1')] == ['ticket-2']
+    assert [t['id'] for t in storage.get_tickets_by_column('col-2')] == ['ticket-3', 'ticket-1']
+
+    ticket = storage.create_ticket('col-3', 'New', 'Fresh', 4)
+    assert ticket['id'] in [t['id'] for t in storage.get_tickets_by_column('col-3')]
+
+    storage.update_column('col-3', name='Shipped')
+    assert storage.get_columns_by_board('default-board')[2]['name'] == 'Shipped'
+
+def test_ticket_write_reloads_only_its_column():
+    """Test a ticket write invalidates its column's tickets, not the whole board"""
+    inner, storage, clock = make_storage()
+    storage.warm('default-board')
+    storage.update_ticket('ticket-1', title='Renamed')
+
+    with patch.object(inner, 'get_tickets_by_column', wraps=inner.get_tickets_by_column) as get_tickets:
+        tickets = storage.get_all_tickets_by_board('default-board')
+    get_tickets.assert_called_once_with('col-1')
+    assert tickets[0]['title'] == 'Renamed'
+
+    # an edit leaves the counters alone, so the board stays cached
+    assert 'default-board' in storage.boards
+
+def test_counters_are_read_back():
+    """Test ticket writes that change counters are reflected on the next read"""
+    inner, storage, clock = make_storage()
+    storage.warm('default-board')
+    before = storage.get_board('default-board')['last_modified']
+
+    storage.create_ticket('col-1', 'New', '', 2)
+    assert storage.get_columns_by_board('default-board')[0]['ticket_count'] == 3
+    board = storage.get_board('default-board')
+    assert board['ticket_count'] == 8
+    assert board['last_modified'] >= before
+
+    storage.update_ticket('ticket-1', column_id='col-2', position=1)
+    assert [c['ticket_count'] for c in storage.get_columns_by_board('default-board')] == [2, 2, 4]
+
+    storage.delete_ticket('ticket-2')
+    storage.archive_ticket('ticket-4')
+    assert [c['ticket_count'] for c in storage.get_columns_by_board('default-board')] == [1, 2, 3]
+    assert storage.get_board('default-board')['ticket_count'] == 6
+
+def test_stale_entries_are_refreshed_in_the_background():
+    """Test stale entries are served while a single background reload runs"""
+    inner, storage, clock = make_storage(ttl=5)
+    storage.warm('default-board')
+    inner.update_ticket('ticket-1', title='Changed elsewhere')
+    clock.now += 6
+
+    release = threading.Event()
+    load_column = storage.load_column
+
+    def slow_load_column(column_id):
+        release.wait(5)
+        return load_column(column_id)
+
+    with patch.object(storage, 'load_column', side_effect=slow_load_column) as reload:
+        # stale data is served straight away, with one reload however many readers
+        for _ in range(5):
+            assert storage.get_tickets_by_column('col-1')[0]['title'] == 'Prompt LLM to init'
+        release.set()
+        storage.executor.shutdown(wait=True)
+    assert reload.call_count == 1
+    assert storage.get_tickets_by_column('col-1')[0]['title'] == 'Changed elsewhere'
+
+def test_create_storage_with_working_set():
+    """Test create_storage puts the working set in front of the engine"""
+    storage = create_storage('memory', coalesce_window_ms=0, working_set=True)
+    assert isinstance(storage, WorkingSetStorage)
+    assert isinstance(storage.storage, InMemoryStorage)
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_the_most_recent_boards():
+    """Test warm-up picks the most recently modified boards and bounds concurrency"""
+    inner = InMemoryStorage()
+    board_ids = []
+    for i in range(6):
+        board = inner.create_board(f'Board {i}')
+        column = inner.create_column(board['id'], 'To Do', 0)
+        inner.create_ticket(column['id'], f'Ticket {i}', '', 0)
+        board_ids.append(board['id'])
+    storage = WorkingSetStorage(inner)
+
+    running = 0
+    most_running = 0
+    lock = threading.Lock()
+    warm = storage.warm
+
+    def slow_warm(board_id):
+        nonlocal running, most_running
+        with lock:
+            running += 1
+            most_running = max(most_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return warm(board_id)
+
+    progress = WarmUp()
+    with patch.object(storage, 'warm', side_effect=slow_warm):
+        await warm_up(storage, progress, count=4, concurrency=2)
+
+    assert progress.status() == {'ready': True, 'warmUp': 'done', 'boards': 4, 'loaded': 4, 'failed': 0}
+    assert most_running == 2
+    # boards given tickets later were modified more recently
+    assert set(storage.boards) == set(board_ids[2:])
+
+@pytest.mark.asyncio
+async def test_warm_up_disabled_without_working_set():
+    """Test warm-up reports ready straight away when there is no working set"""
+    progress = WarmUp()
+    await warm_up(InMemoryStorage(), progress, count=4)
+    assert progress.ready
+    assert progress.state == 'disabled'
+
+def test_ready_endpoint():
+    """Test /ready is 503 while warming and 200 once the hot boards are loaded"""
+    inner = InMemoryStorage()
+    storage = WorkingSetStorage(inner)
+    app = create_app(storage=storage)
+
+    response = TestClient(app).get('/ready')
+    assert response.status_code == 503
+    assert response.json()['warmUp'] == 'pending'
+
+    with patch('app.warm_up', lambda s, p: warm_up(s, p, count=5)):
+        with TestClient(app) as client:
+            for _ in range(50):
+                response = client.get('/ready')
+                if response.status_code == 200:
+                    break
+                time.sleep(0.01)
+    assert response.status_code == 200
+    assert response.json()['loaded'] == 1
+    assert 'default-board' in storage.boards
@@ -0,0 +1,324 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from storage import Storage, projected, project
+
+# Warm-up settings - on startup the WARM_BOARD_COUNT most recently modified
+# boards are loaded, WARM_CONCURRENCY at a time, into an in-process working
+# set. Entries older than WORKING_SET_TTL_SECONDS are refreshed in the
+# background. WARM_BOARD_COUNT=0 disables the working set.
+WARM_BOARD_COUNT = int(os.getenv('WARM_BOARD_COUNT', '0'))
+WARM_CONCURRENCY = int(os.getenv('WARM_CONCURRENCY', '4'))
+WORKING_SET_TTL_SECONDS = float(os.getenv('WORKING_SET_TTL_SECONDS', '5'))
+
+
+class WorkingSetStorage(Storage):
+    """
+    In-process copy of the hot boards in front of another storage engine.
+    Boards loaded with warm() serve their board, column and ticket reads
+    from memory. Entries older than ttl are still served while one
+    background refresh per entry reloads them, so expiry never puts
+    DynamoDB on the request path.
+
+    Writes go straight through. Column and board writes drop the board's
+    entry, and ticket writes drop the affected columns' tickets, so this
+    process reads its own writes with a single reload. Ticket writes that
+    change counters (creates, deletes, archives and moves) also drop the
+    board's entry, so ticket_count and last_modified are read back too.
+    """
+
+    def __init__(self, storage, ttl=WORKING_SET_TTL_SECONDS, clock=time.monotonic):
+        self.storage = storage
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.RLock()
+        # board_id -> {'loaded', 'board', 'columns'}
+        self.boards = {}
+        # column_id -> {'loaded', 'tickets'}
+        self.columns = {}
+        # boards kept warm, and the board/column each column/ticket was last seen in
+        self.hot = set()
+        self.column_boards = {}
+        self.ticket_columns = {}
+        # bumped on every invalidation so a load racing a write is discarded
+        self.generations = {}
+        self.refreshing = set()
+        self.executor = ThreadPoolExecutor(max_workers=WARM_CONCURRENCY)
+
+    def warm(self, board_id):
+        """Load a board with its columns and tickets into the working set"""
+        entry = self.load_board(board_id)
+        if entry is not None:
+            for column in entry['columns']:
+                self.load_column(column['id'])
+        return entry
+
+    def load_board(self, board_id):
+        key = ('board', board_id)
+        with self.lock:
+            generation = self.generations.get(key, 0)
+        board = self.storage.get_board(board_id)
+        if board is None:
+            with self.lock:
+                self.hot.discard(board_id)
+                self.invalidate(key)
+            return None
+        columns = self.storage.get_columns_by_board(board_id)
+
+        entry = {'loaded': self.clock(), 'board': board, 'columns': columns}
+        with self.lock:
+            self.hot.add(board_id)
+            for column in columns:
+                self.column_boards[column['id']] = board_id
+            if self.generations.get(key, 0) != generation:
+                return entry
+            self.boards[board_id] = entry
+        return entry
+
+    def load_column(self, column_id):
+        key = ('column', column_id)
+        with self.lock:
+            generation = self.generations.get(key, 0)
+        tickets = self.storage.get_tickets_by_column(column_id)
+
+        entry = {'loaded': self.clock(), 'tickets': tickets}
+        with self.lock:
+            for ticket in tickets:
+                self.ticket_columns[ticket['id']] = column_id
+            if self.generations.get(key, 0) != generation:
+                return entry
+            self.columns[column_id] = entry
+        return entry
+
+    def refresh(self, key):
+        """Reload an entry in the background, once however many readers find it stale"""
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            kind, item_id = key
+            try:
+                if kind == 'board':
+                    self.load_board(item_id)
+                else:
+                    self.load_column(item_id)
+            except Exception as e:
+                print(f"Error refreshing {kind} {item_id}: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        self.executor.submit(run)
+
+    def cached(self, key, entries, item_id):
+        """A hot entry, refreshed in the background if stale, or None"""
+        with self.lock:
+            entry = entries.get(item_id)
+            stale = entry is not None and self.clock() - entry['loaded'] >= self.ttl
+        if stale:
+            self.refresh(key)
+        return entry
+
+    def board_entry(self, board_id):
+        if board_id not in self.hot:
+            return None
+        return self.cached(('board', board_id), self.boards, board_id) or self.load_board(board_id)
+
+    def column_entry(self, column_id):
+        if self.column_boards.get(column_id) not in self.hot:
+            return None
+        return self.cached(('column', column_id), self.columns, column_id) or self.load_column(column_id)
+
+    def invalidate(self, *keys):
+        """Drop entries, the next read reloads them"""
+        with self.lock:
+            for key in keys:
+                kind, item_id = key
+                if item_id is not None:
+                    (self.boards if kind == 'board' else self.columns).pop(item_id, None)
+                    self.generations[key] = self.generations.get(key, 0) + 1
+
+    def ticket_written(self, *column_ids, counted=True):
+        """Drop the columns' tickets, and their boards' counters if the write changed them"""
+        column_ids = [column_id for column_id in column_ids if column_id is not None]
+        keys = [('column', column_id) for column_id in column_ids]
+        if counted:
+            keys += [('board', board_id) for board_id in {self.column_boards.get(column_id) for column_id in column_ids}]
+        self.invalidate(*keys)
+
+    """
+    READS - served from the working set for hot boards
+    """
+    def get_board(self, board_id):
+        entry = self.board_entry(board_id)
+        if entry is None:
+            return self.storage.get_board(board_id)
+        return dict(entry['board'])
+
+    def get_columns_by_board(self, board_id, attributes=None):
+        entry = self.board_entry(board_id)
+        if entry is None:
+            return self.storage.get_columns_by_board(board_id, attributes)
+        attributes = projected(attributes, 'id', 'position')
+        return [project(dict(column), attributes) for column in entry['columns']]
+
+    def get_tickets_by_column(self, column_id, attributes=None):
+        entry = self.column_entry(column_id)
+        if entry is None:
+            return self.storage.get_tickets_by_column(column_id, attributes)
+        attributes = projected(attributes, 'id', 'column_id', 'position')
+        return [project(dict(ticket), attributes) for ticket in entry['tickets']]
+
+    """
+    WRITES - go straight through, then invalidate what they touched
+    """
+    def update_board(self, board_id, name):
+        board = self.storage.update_board(board_id, name)
+        self.invalidate(('board', board_id))
+        return board
+
+    def delete_board(self, board_id):
+        with self.lock:
+            self.hot.discard(board_id)
+            column_ids = [column_id for column_id, owner in self.column_boards.items() if owner == board_id]
+        result = self.storage.delete_board(board_id)
+        self.invalidate(('board', board_id), *(('column', column_id) for column_id in column_ids))
+        return result
+
+    def create_column(self, board_id, name, position, id=None):
+        column = self.storage.create_column(board_id, name, position, id)
+        self.invalidate(('board', board_id))
+        return column
+
+    def update_column(self, column_id, name=None, position=None):
+        column = self.storage.update_column(column_id, name, position)
+        self.invalidate(('board', self.column_boards.get(column_id)))
+        return column
+
+    def delete_column(self, column_id):
+        result = self.storage.delete_column(column_id)
+        self.invalidate(('board', self.column_boards.get(column_id)), ('column', column_id))
+        return result
+
+    def create_ticket(self, column_id, title, description, position, id=None):
+        ticket = self.storage.create_ticket(column_id, title, description, position, id)
+        self.ticket_written(column_id)
+        return ticket
+
+    def update_ticket(self, ticket_id, title=None, description=None, column_id=None, position=None):
+        ticket = self.storage.update_ticket(ticket_id, title, description, column_id, position)
+        self.ticket_written(self.ticket_columns.get(ticket_id), column_id, counted=column_id is not None)
+        return ticket
+
+    def delete_ticket(self, ticket_id):
+        result = self.storage.delete_ticket(ticket_id)
+        self.ticket_written(self.ticket_columns.get(ticket_id))
+        return result
+
+    def archive_ticket(self, ticket_id):
+        archived = self.storage.archive_ticket(ticket_id)
+        self.ticket_written(self.ticket_columns.get(ticket_id))
+        return archived
+
+    """
+    Everything else goes straight through
+    """
+    def init(self):
+        self.storage.init()
+
+    def get_tables(self):
+        return self.storage.get_tables()
+
+    def flush(self):
+        self.storage.flush()
+
+    def seed(self):
+        self.storage.seed()
+
+    def get_boards(self):
+        return self.storage.get_boards()
+
+    def create_board(self, name, id=None, shard_count=None):
+        return self.storage.create_board(name, id, shard_count)
+
+    def get_board_summaries(self):
+        return self.storage.get_board_summaries()
+
+    def get_column(self, column_id):
+        return self.storage.get_column(column_id)
+
+    def get_ticket(self, ticket_id):
+        return self.storage.get_ticket(ticket_id)
+
+    def get_archived_tickets(self, board_id, limit=50, cursor=None):
+        return self.storage.get_archived_tickets(board_id, limit, cursor)
+
+
+def hot_boards(storage, count):
+    """Ids of the count most recently modified boards"""
+    summaries = sorted(storage.get_board_summaries(), key=lambda board: board.get('last_modified') or '', reverse=True)
+    return [board['id'] for board in summaries[:count]]
+
+
+class WarmUp:
+    """Progress of the startup warm-up, reported by the readiness endpoint"""
+
+    def __init__(self):
+        self.state = 'pending'
+        self.total = 0
+        self.loaded = 0
+        self.failed = 0
+        self.error = None
+
+    @property
+    def ready(self):
+        return self.state in ('done', 'failed', 'disabled')
+
+    def status(self):
+        status = {
+            'ready': self.ready,
+            'warmUp': self.state,
+            'boards': self.total,
+            'loaded': self.loaded,
+            'failed': self.failed,
+        }
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+async def warm_up(storage, progress, count=WARM_BOARD_COUNT, concurrency=WARM_CONCURRENCY):
+    """Load the hottest boards into a WorkingSetStorage, at most concurrency at a time"""
+    if not isinstance(storage, WorkingSetStorage) or count <= 0:
+        progress.state = 'disabled'
+        return
+
+    progress.state = 'warming'
+    try:
+        board_ids = await asyncio.to_thread(hot_boards, storage.storage, count)
+    except Exception as e:
+        print(f"Error listing boards to warm: {e}")
+        progress.state = 'failed'
+        progress.error = str(e)
+        return
+    progress.total = len(board_ids)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(board_id):
+        async with semaphore:
+            try:
+                await asyncio.to_thread(storage.warm, board_id)
+                progress.loaded += 1
+            except Exception as e:
+                print(f"Error warming board {board_id}: {e}")
+                progress.failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(load(board_id) for board_id in board_ids))
+    progress.state = 'done'
+    print(f"Warmed {progress.loaded} of {progress.total} boards in {time.perf_counter() - started:.2f}s")